@@ -133,17 +133,21 @@ def llm_call(state: dict):
 
 # Step 4: Define tool node
 
+import asyncio
 from langchain.messages import ToolMessage
 
 
-def tool_node(state: dict):
-    """Performs the tool call"""
+async def tool_node(state: dict):
+    """Performs the tool calls concurrently"""
 
-    result = []
-    for tool_call in state["messages"][-1].tool_calls:
-        tool = tools_by_name[tool_call["name"]]
-        observation = tool.invoke(tool_call["args"])
-        result.append(ToolMessage(content=observation, tool_call_id=tool_call["id"]))
+    tool_calls = state["messages"][-1].tool_calls
+    observations = await asyncio.gather(
+        *(tools_by_name[tool_call["name"]].ainvoke(tool_call["args"]) for tool_call in tool_calls)
+    )
+    result = [
+        ToolMessage(content=observation, tool_call_id=tool_call["id"])
+        for tool_call, observation in zip(tool_calls, observations)
+    ]
     return {"messages": result}
 
 # Step 5: Define logic to determine whether to end
@@ -195,6 +199,7 @@ display(Image(agent.get_graph(xray=True).draw_mermaid_png()))
 # Invoke
 from langchain.messages import HumanMessage
 messages = [HumanMessage(content="Use tools to calculate the average of the list [1,2222,9]")]
-messages = agent.invoke({"messages": messages})
+# tool_node is async, so the graph has to run through ainvoke
+messages = asyncio.run(agent.ainvoke({"messages": messages}))
 for m in messages["messages"]:
     m.pretty_print()
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import logging
-from collections import defaultdict
-from time import monotonic
+from time import monotonic_ns
+
+from crawler.anti_throttle.state import NS_PER_SECOND, DomainState, get_state
 
 logger = logging.getLogger(__name__)
 
@@ -10,51 +11,59 @@ logger = logging.getLogger(__name__)
 class CircuitBreaker:
     """Per-domain circuit breaker that pauses requests after consecutive failures."""
 
-    def __init__(self, threshold: int = 5, cooldown: float = 300.0):
+    def __init__(
+        self,
+        threshold: int = 5,
+        cooldown: float = 300.0,
+        states: dict[str, DomainState] | None = None,
+    ):
         self.threshold = threshold
         self.cooldown = cooldown
-        self._failure_counts: dict[str, int] = defaultdict(int)
-        self._open_since: dict[str, float] = {}
+        self._cooldown_ns = int(cooldown * NS_PER_SECOND)
+        self._states = states if states is not None else {}
 
     def is_open(self, domain: str) -> bool:
         """Check if the circuit is open (domain is paused)."""
-        if domain not in self._open_since:
+        state = self._states.get(domain)
+        if state is None or state.open_since_ns is None:
             return False
 
-        elapsed = monotonic() - self._open_since[domain]
-        if elapsed >= self.cooldown:
+        elapsed_ns = monotonic_ns() - state.open_since_ns
+        if elapsed_ns >= self._cooldown_ns:
             # Cooldown expired, half-open: allow a retry
-            logger.info("Circuit breaker half-open for %s after %.0fs cooldown", domain, elapsed)
-            del self._open_since[domain]
-            self._failure_counts[domain] = 0
+            logger.info("Circuit breaker half-open for %s after %.0fs cooldown", domain, elapsed_ns / NS_PER_SECOND)
+            state.open_since_ns = None
+            state.failures = 0
             return False
 
         return True
 
     def record_success(self, domain: str) -> None:
         """Record a successful request, resetting failure count."""
-        self._failure_counts[domain] = 0
-        if domain in self._open_since:
-            del self._open_since[domain]
+        state = get_state(self._states, domain)
+        state.failures = 0
+        if state.open_since_ns is not None:
+            state.open_since_ns = None
             logger.info("Circuit breaker closed for %s (recovered)", domain)
 
     def record_failure(self, domain: str) -> None:
         """Record a failed request. Opens circuit if threshold is reached."""
-        self._failure_counts[domain] += 1
-        if self._failure_counts[domain] >= self.threshold:
-            self._open_since[domain] = monotonic()
+        state = get_state(self._states, domain)
+        state.failures += 1
+        if state.failures >= self.threshold:
+            state.open_since_ns = monotonic_ns()
             logger.warning(
                 "Circuit breaker OPEN for %s (%d consecutive failures, cooldown %.0fs)",
                 domain,
-                self._failure_counts[domain],
+                state.failures,
                 self.cooldown,
             )
 
     def get_status(self, domain: str) -> str:
         """Get circuit status for a domain."""
-        if domain in self._open_since:
-            elapsed = monotonic() - self._open_since[domain]
-            if elapsed >= self.cooldown:
+        state = self._states.get(domain)
+        if state is not None and state.open_since_ns is not None:
+            if monotonic_ns() - state.open_since_ns >= self._cooldown_ns:
                 return "half-open"
             return "open"
         return "closed"
@@ -3,8 +3,9 @@ from __future__ import annotations
 import asyncio
 import logging
 import random
-from collections import defaultdict
-from time import monotonic
+from time import monotonic_ns
+
+from crawler.anti_throttle.state import NS_PER_SECOND, DomainState, get_state
 
 logger = logging.getLogger(__name__)
 
@@ -12,38 +13,51 @@ logger = logging.getLogger(__name__)
 class AdaptiveDelay:
     """Per-domain adaptive delay with exponential backoff on errors."""
 
-    def __init__(self, min_delay: float = 2.0, max_delay: float = 7.0):
+    def __init__(
+        self,
+        min_delay: float = 2.0,
+        max_delay: float = 7.0,
+        states: dict[str, DomainState] | None = None,
+    ):
         self.min_delay = min_delay
         self.max_delay = max_delay
-        self._last_request: dict[str, float] = defaultdict(float)
-        self._backoff_factor: dict[str, float] = defaultdict(lambda: 1.0)
+        self._min_delay_ns = int(min_delay * NS_PER_SECOND)
+        self._max_delay_ns = int(max_delay * NS_PER_SECOND)
+        self._states = states if states is not None else {}
 
-    def _jittered_delay(self, domain: str) -> float:
-        """Calculate a random delay with jitter, scaled by backoff factor."""
-        base = random.uniform(self.min_delay, self.max_delay)
-        return base * self._backoff_factor[domain]
+    def get_backoff_factor(self, domain: str) -> float:
+        """Get the current backoff multiplier for a domain."""
+        state = self._states.get(domain)
+        return state.backoff if state else 1.0
 
     async def wait(self, domain: str) -> None:
         """Wait an appropriate amount of time before making a request to the domain."""
-        now = monotonic()
-        elapsed = now - self._last_request[domain]
-        delay = self._jittered_delay(domain)
-
-        if elapsed < delay:
-            wait_time = delay - elapsed
-            logger.debug("Throttle: waiting %.1fs for %s", wait_time, domain)
-            await asyncio.sleep(wait_time)
-
-        self._last_request[domain] = monotonic()
+        state = get_state(self._states, domain)
+        now = monotonic_ns()
+        wait_ns = 0
+
+        if state.last_ns is not None:
+            delay_ns = int(random.randint(self._min_delay_ns, self._max_delay_ns) * state.backoff)
+            wait_ns = delay_ns - (now - state.last_ns)
+
+        # Record when the request will go out, so the clock is only read once
+        if wait_ns > 0:
+            state.last_ns = now + wait_ns
+            logger.debug("Throttle: waiting %.1fs for %s", wait_ns / NS_PER_SECOND, domain)
+            await asyncio.sleep(wait_ns / NS_PER_SECOND)
+        else:
+            state.last_ns = now
 
     def report_success(self, domain: str) -> None:
         """Reset backoff on successful request."""
-        self._backoff_factor[domain] = max(1.0, self._backoff_factor[domain] * 0.5)
+        state = get_state(self._states, domain)
+        state.backoff = max(1.0, state.backoff * 0.5)
 
     def report_error(self, domain: str, status_code: int | None = None) -> None:
         """Increase backoff on error (especially 429/503)."""
+        state = get_state(self._states, domain)
         if status_code in (429, 503):
-            self._backoff_factor[domain] = min(10.0, self._backoff_factor[domain] * 2.0)
-            logger.warning("Rate limited on %s (HTTP %s), backoff factor: %.1f", domain, status_code, self._backoff_factor[domain])
+            state.backoff = min(10.0, state.backoff * 2.0)
+            logger.warning("Rate limited on %s (HTTP %s), backoff factor: %.1f", domain, status_code, state.backoff)
         else:
-            self._backoff_factor[domain] = min(5.0, self._backoff_factor[domain] * 1.5)
+            state.backoff = min(5.0, state.backoff * 1.5)
@@ -1,42 +1,44 @@
 from __future__ import annotations
 
 import random
-from pathlib import Path
 
-from crawler.settings import CONFIGS_DIR
+from crawler.settings import load_user_agents
 
 
-_user_agents: list[str] | None = None
+# Module-level RNG so fingerprint draws don't contend on the shared global one
+_rng = random.Random()
 
+_ACCEPT_LANGUAGES = (
+    "en-US,en;q=0.9",
+    "en-GB,en;q=0.9",
+    "en-US,en;q=0.5",
+    "en;q=0.9",
+)
 
-def _load_user_agents() -> list[str]:
-    """Load user agents from file, caching the result."""
-    global _user_agents
-    if _user_agents is None:
-        ua_path = CONFIGS_DIR / "user_agents.txt"
-        with open(ua_path) as f:
-            _user_agents = [line.strip() for line in f if line.strip()]
-    return _user_agents
+_VIEWPORTS = (
+    {"width": 1920, "height": 1080},
+    {"width": 1366, "height": 768},
+    {"width": 1440, "height": 900},
+    {"width": 1536, "height": 864},
+    {"width": 1280, "height": 720},
+    {"width": 1600, "height": 900},
+    {"width": 2560, "height": 1440},
+)
+
+_USER_AGENTS: tuple[str, ...] = tuple(load_user_agents())
 
 
 def random_user_agent() -> str:
     """Return a random user agent string."""
-    agents = _load_user_agents()
-    return random.choice(agents)
+    return _USER_AGENTS[_rng.randrange(len(_USER_AGENTS))]
 
 
-def random_headers() -> dict[str, str]:
-    """Generate randomized but realistic HTTP headers."""
-    ua = random_user_agent()
-    headers = {
-        "User-Agent": ua,
+def _build_headers(user_agent: str, accept_language: str) -> dict[str, str]:
+    """Build realistic HTTP headers in a fixed, browser-like order."""
+    return {
+        "User-Agent": user_agent,
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-        "Accept-Language": random.choice([
-            "en-US,en;q=0.9",
-            "en-GB,en;q=0.9",
-            "en-US,en;q=0.5",
-            "en;q=0.9",
-        ]),
+        "Accept-Language": accept_language,
         "Accept-Encoding": "gzip, deflate, br",
         "DNT": "1",
         "Connection": "keep-alive",
@@ -47,21 +49,18 @@ def random_headers() -> dict[str, str]:
         "Sec-Fetch-User": "?1",
     }
 
-    # Randomize header order
-    items = list(headers.items())
-    random.shuffle(items)
-    return dict(items)
+
+# Every UA x Accept-Language combination, built once so requests only pick one
+_HEADER_POOL: tuple[dict[str, str], ...] = tuple(
+    _build_headers(ua, lang) for ua in _USER_AGENTS for lang in _ACCEPT_LANGUAGES
+)
+
+
+def random_headers() -> dict[str, str]:
+    """Return randomized but realistic HTTP headers."""
+    return _HEADER_POOL[_rng.randrange(len(_HEADER_POOL))].copy()
 
 
 def random_viewport() -> dict[str, int]:
     """Return a random realistic browser viewport size."""
-    viewports = [
-        {"width": 1920, "height": 1080},
-        {"width": 1366, "height": 768},
-        {"width": 1440, "height": 900},
-        {"width": 1536, "height": 864},
-        {"width": 1280, "height": 720},
-        {"width": 1600, "height": 900},
-        {"width": 2560, "height": 1440},
-    ]
-    return random.choice(viewports)
+    return _VIEWPORTS[_rng.randrange(len(_VIEWPORTS))]
@@ -10,7 +10,9 @@ class ProxyPool:
     """Manages a pool of proxy URLs for rotation."""
 
     def __init__(self, proxy_urls: list[str] | None = None):
-        self._proxies = proxy_urls or []
+        self._proxies: list[str] = list(dict.fromkeys(proxy_urls or []))
+        # Set mirror of _proxies for O(1) membership checks
+        self._proxy_set: set[str] = set(self._proxies)
         self._index = 0
 
     @property
@@ -33,11 +35,16 @@ class ProxyPool:
 
     def add_proxy(self, proxy_url: str) -> None:
         """Add a proxy to the pool."""
-        if proxy_url not in self._proxies:
+        if proxy_url not in self._proxy_set:
+            self._proxy_set.add(proxy_url)
             self._proxies.append(proxy_url)
 
     def remove_proxy(self, proxy_url: str) -> None:
         """Remove a failed proxy from the pool."""
-        if proxy_url in self._proxies:
-            self._proxies.remove(proxy_url)
+        if proxy_url in self._proxy_set:
+            self._proxy_set.discard(proxy_url)
+            # Swap with the last entry and pop, instead of shifting the whole list
+            i = self._proxies.index(proxy_url)
+            self._proxies[i] = self._proxies[-1]
+            self._proxies.pop()
             logger.warning("Removed proxy %s from pool (%d remaining)", proxy_url, len(self._proxies))
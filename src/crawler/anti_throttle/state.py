@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+NS_PER_SECOND = 1_000_000_000
+
+
+class DomainState:
+    """Mutable per-domain throttling state.
+
+    AdaptiveDelay and CircuitBreaker can share one ``dict[str, DomainState]``
+    so every request hashes the domain once and reads plain slot attributes.
+    """
+
+    __slots__ = ("last_ns", "backoff", "failures", "open_since_ns")
+
+    def __init__(self) -> None:
+        self.last_ns: int | None = None
+        self.backoff: float = 1.0
+        self.failures: int = 0
+        self.open_since_ns: int | None = None
+
+
+def get_state(states: dict[str, DomainState], domain: str) -> DomainState:
+    """Return the state for a domain, creating it on first use."""
+    state = states.get(domain)
+    if state is None:
+        state = states[domain] = DomainState()
+    return state
@@ -8,6 +8,7 @@ from sqlalchemy import (
     DateTime,
     Date,
     Float,
+    Index,
     Integer,
     String,
     Text,
@@ -69,11 +70,13 @@ class LLMPatternCache(Base):
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     domain: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     page_signature: Mapped[str] = mapped_column(Text, nullable=False)
+    raw_hash: Mapped[str | None] = mapped_column(String(32), nullable=True)
     selectors: Mapped[dict] = mapped_column(JSONB, nullable=False)
     verified_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     __table_args__ = (
         UniqueConstraint("domain", "page_signature", name="uq_domain_signature"),
+        Index("ix_llm_pattern_cache_domain_raw_hash", "domain", "raw_hash"),
     )
 
     def __repr__(self) -> str:
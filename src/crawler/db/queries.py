@@ -4,9 +4,10 @@ import hashlib
 import logging
 from datetime import datetime, timezone
 from typing import Any
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from sqlalchemy import select, update
+from sqlalchemy import Row, bindparam, column, insert, literal_column, select, table, update
+from sqlalchemy.dialects.postgresql import Insert
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -14,24 +15,66 @@ from crawler.db.models import CrawlRun, JobPosting, LLMPatternCache
 
 logger = logging.getLogger(__name__)
 
+# Columns written by a job upsert; every row of a multi-VALUES insert must carry all of them
+JOB_UPSERT_COLUMNS = (
+    "source_site",
+    "source_url",
+    "search_keyword",
+    "title",
+    "company",
+    "location",
+    "salary_range",
+    "description",
+    "posted_date",
+)
+
+# Rows per multi-VALUES statement, keeps bind params well under Postgres' 32767 limit
+BULK_UPSERT_CHUNK_SIZE = 1000
+
+# Chunks larger than this are staged with COPY and merged with one INSERT ... SELECT
+COPY_UPSERT_MIN_BATCH = 100
+
+# Per-transaction staging table for COPY upserts
+_JOB_STAGE_TABLE = "job_postings_stage"
+_JOB_STAGE_COLUMNS = ("id", "content_hash", *JOB_UPSERT_COLUMNS)
+
 
 def compute_content_hash(description: str | None, title: str = "", company: str = "") -> str:
-    """Compute SHA-256 hash of job content for deduplication."""
-    content = f"{title}|{company}|{description or ''}"
-    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+    """Compute a BLAKE2b hash of job content for deduplication.
 
+    Hashes "title|company|description" incrementally so long descriptions
+    aren't copied into a joined string first. The 32-byte digest keeps the
+    64 hex chars the content_hash column expects.
+    """
+    hasher = hashlib.blake2b(digest_size=32)
+    hasher.update(title.encode("utf-8"))
+    hasher.update(b"|")
+    hasher.update(company.encode("utf-8"))
+    hasher.update(b"|")
+    if description:
+        hasher.update(description.encode("utf-8"))
+    return hasher.hexdigest()
 
-async def upsert_job_posting(session: AsyncSession, job_data: dict[str, Any]) -> str:
-    """Insert or update a job posting. Returns 'new', 'updated', or 'unchanged'."""
-    content_hash = compute_content_hash(
+
+def _job_content_hash(job_data: dict[str, Any]) -> str:
+    return compute_content_hash(
         job_data.get("description"),
         job_data.get("title", ""),
         job_data.get("company", ""),
     )
-    job_data["content_hash"] = content_hash
 
-    # Try insert with ON CONFLICT
-    stmt = pg_insert(JobPosting).values(**job_data)
+
+def compute_content_hashes(jobs: list[dict[str, Any]]) -> list[str]:
+    """Compute content hashes for a batch of jobs.
+
+    Hashed inline: BLAKE2b takes microseconds on a job description, less than
+    handing each job to a worker thread would cost.
+    """
+    return [_job_content_hash(job_data) for job_data in jobs]
+
+
+def _job_upsert_stmt(stmt: Insert) -> Insert:
+    """Attach the shared ON CONFLICT update and RETURNING clause to a job postings insert."""
     stmt = stmt.on_conflict_do_update(
         index_elements=["source_url"],
         set_={
@@ -47,48 +90,120 @@ async def upsert_job_posting(session: AsyncSession, job_data: dict[str, Any]) ->
         },
         where=(JobPosting.content_hash != stmt.excluded.content_hash),
     )
+    # xmax is 0 only for freshly inserted rows; rows skipped by the WHERE aren't returned
+    return stmt.returning(JobPosting.source_url, literal_column("(xmax = 0)").label("inserted"))
 
-    result = await session.execute(stmt)
-    await session.commit()
 
-    if result.rowcount == 0:
+async def upsert_job_posting(session: AsyncSession, job_data: dict[str, Any]) -> str:
+    """Insert or update a job posting. Returns 'new', 'updated', or 'unchanged'.
+
+    Does not commit; the caller owns the transaction.
+    """
+    job_data["content_hash"] = _job_content_hash(job_data)
+
+    result = await session.execute(_job_upsert_stmt(pg_insert(JobPosting).values(**job_data)))
+    row = result.first()
+    if row is None:
         return "unchanged"
+    return "new" if row.inserted else "updated"
+
 
-    # Check if this was a new row or an update
-    existing = await session.execute(
-        select(JobPosting).where(JobPosting.source_url == job_data["source_url"])
+async def _copy_upsert_rows(session: AsyncSession, rows: list[dict[str, Any]]) -> list[Row]:
+    """Upsert rows by COPYing them into a temp staging table and merging it in one statement.
+
+    COPY's binary protocol skips per-row parse/plan work, which pays off on
+    large first-time crawls where nearly every row is new.
+    """
+    conn = await session.connection()
+    raw_conn = await conn.get_raw_connection()
+    driver_conn = raw_conn.driver_connection
+
+    await driver_conn.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {_JOB_STAGE_TABLE} "
+        "(LIKE job_postings INCLUDING DEFAULTS) ON COMMIT DROP"
+    )
+    await driver_conn.execute(f"TRUNCATE {_JOB_STAGE_TABLE}")
+    await driver_conn.copy_records_to_table(
+        _JOB_STAGE_TABLE,
+        records=[(uuid4(), *(row[col] for col in _JOB_STAGE_COLUMNS[1:])) for row in rows],
+        columns=_JOB_STAGE_COLUMNS,
     )
-    row = existing.scalar_one_or_none()
-    if row and row.crawled_at == row.updated_at:
-        return "new"
-    return "updated"
 
+    stage = table(_JOB_STAGE_TABLE, *(column(col) for col in _JOB_STAGE_COLUMNS))
+    stmt = pg_insert(JobPosting).from_select(_JOB_STAGE_COLUMNS, select(*stage.c))
+    result = await session.execute(_job_upsert_stmt(stmt))
+    return result.all()
 
-async def upsert_job_postings_batch(
-    session: AsyncSession, jobs: list[dict[str, Any]]
-) -> dict[str, int]:
-    """Batch upsert job postings. Returns counts of new/updated/unchanged."""
-    counts = {"new": 0, "updated": 0, "unchanged": 0}
+
+async def _upsert_rows_individually(
+    session: AsyncSession, jobs: list[dict[str, Any]], counts: dict[str, int]
+) -> None:
+    """Upsert jobs one by one, each in its own savepoint, so a bad row only fails itself."""
     for job_data in jobs:
         try:
-            result = await upsert_job_posting(session, job_data)
+            async with session.begin_nested():
+                result = await upsert_job_posting(session, job_data)
             counts[result] += 1
         except Exception:
             logger.exception("Failed to upsert job: %s", job_data.get("source_url", "unknown"))
-            counts.setdefault("error", 0)
             counts["error"] = counts.get("error", 0) + 1
+
+
+async def upsert_job_postings_batch(
+    session: AsyncSession, jobs: list[dict[str, Any]]
+) -> dict[str, int]:
+    """Batch upsert job postings. Returns counts of new/updated/unchanged.
+
+    Sends one multi-VALUES INSERT ... ON CONFLICT per chunk (or stages large
+    chunks with COPY) and classifies rows from the RETURNING clause. A chunk
+    that fails is retried row by row. Does not commit; the caller owns the
+    transaction.
+    """
+    counts = {"new": 0, "updated": 0, "unchanged": 0}
+
+    # ON CONFLICT can't touch the same row twice in one statement, so the last duplicate wins
+    unique_jobs = list({job_data.get("source_url"): job_data for job_data in jobs}.values())
+    counts["unchanged"] += len(jobs) - len(unique_jobs)
+
+    rows = [
+        {**{col: job_data.get(col) for col in JOB_UPSERT_COLUMNS}, "content_hash": content_hash}
+        for job_data, content_hash in zip(unique_jobs, compute_content_hashes(unique_jobs))
+    ]
+
+    for start in range(0, len(rows), BULK_UPSERT_CHUNK_SIZE):
+        chunk = rows[start:start + BULK_UPSERT_CHUNK_SIZE]
+        try:
+            async with session.begin_nested():
+                if len(chunk) > COPY_UPSERT_MIN_BATCH:
+                    returned = await _copy_upsert_rows(session, chunk)
+                else:
+                    result = await session.execute(_job_upsert_stmt(pg_insert(JobPosting).values(chunk)))
+                    returned = result.all()
+        except Exception:
+            logger.exception("Bulk upsert of %d jobs failed, retrying row by row", len(chunk))
+            await _upsert_rows_individually(session, unique_jobs[start:start + BULK_UPSERT_CHUNK_SIZE], counts)
+            continue
+
+        inserted = sum(1 for row in returned if row.inserted)
+        counts["new"] += inserted
+        counts["updated"] += len(returned) - inserted
+        counts["unchanged"] += len(chunk) - len(returned)
+
     return counts
 
 
 async def create_crawl_run(
-    session: AsyncSession, keyword: str, source: str
-) -> CrawlRun:
-    """Create a new crawl run record."""
-    run = CrawlRun(keyword=keyword, source=source, status="running")
-    session.add(run)
-    await session.commit()
-    await session.refresh(run)
-    return run
+    session: AsyncSession, keyword: str, source: str, started_at: datetime | None = None
+) -> UUID:
+    """Insert a new crawl run record and return its id.
+
+    Does not commit, so the run can share one transaction with its upserts.
+    """
+    values: dict[str, Any] = {"keyword": keyword, "source": source, "status": "running"}
+    if started_at is not None:
+        values["started_at"] = started_at
+    result = await session.execute(insert(CrawlRun).values(**values).returning(CrawlRun.id))
+    return result.scalar_one()
 
 
 async def finish_crawl_run(
@@ -100,7 +215,7 @@ async def finish_crawl_run(
     error_count: int = 0,
     error_message: str | None = None,
 ) -> None:
-    """Mark a crawl run as finished."""
+    """Mark a crawl run as finished. Does not commit."""
     stmt = (
         update(CrawlRun)
         .where(CrawlRun.id == run_id)
@@ -114,40 +229,84 @@ async def finish_crawl_run(
         )
     )
     await session.execute(stmt)
-    await session.commit()
+
+
+# Selector cache statements are built once and reused with per-call parameters
+_SELECT_CACHED_SELECTORS = select(LLMPatternCache.selectors).where(
+    LLMPatternCache.domain == bindparam("domain"),
+    LLMPatternCache.page_signature == bindparam("page_signature"),
+)
+
+_SELECT_SELECTORS_BY_RAW_HASH = (
+    select(LLMPatternCache.selectors)
+    .where(
+        LLMPatternCache.domain == bindparam("domain"),
+        LLMPatternCache.raw_hash == bindparam("raw_hash"),
+    )
+    .order_by(LLMPatternCache.verified_at.desc())
+    .limit(1)
+)
+
+_SELECT_LATEST_DOMAIN_SELECTORS = (
+    select(LLMPatternCache.selectors)
+    .where(LLMPatternCache.domain == bindparam("domain"))
+    .order_by(LLMPatternCache.verified_at.desc())
+    .limit(1)
+)
+
+_insert_selectors = pg_insert(LLMPatternCache)
+_UPSERT_CACHED_SELECTORS = _insert_selectors.on_conflict_do_update(
+    constraint="uq_domain_signature",
+    set_={
+        "selectors": _insert_selectors.excluded.selectors,
+        "raw_hash": _insert_selectors.excluded.raw_hash,
+        "verified_at": _insert_selectors.excluded.verified_at,
+    },
+)
 
 
 async def get_cached_selectors(
     session: AsyncSession, domain: str, page_signature: str
 ) -> dict | None:
     """Retrieve cached CSS selectors for a domain + page signature."""
-    stmt = select(LLMPatternCache).where(
-        LLMPatternCache.domain == domain,
-        LLMPatternCache.page_signature == page_signature,
+    result = await session.execute(
+        _SELECT_CACHED_SELECTORS, {"domain": domain, "page_signature": page_signature}
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_cached_selectors_by_raw(
+    session: AsyncSession, domain: str, raw_hash: str
+) -> dict | None:
+    """Retrieve cached CSS selectors last learned from byte-identical HTML, if any."""
+    result = await session.execute(
+        _SELECT_SELECTORS_BY_RAW_HASH, {"domain": domain, "raw_hash": raw_hash}
     )
-    result = await session.execute(stmt)
-    cache_entry = result.scalar_one_or_none()
-    if cache_entry:
-        return cache_entry.selectors
-    return None
+    return result.scalar_one_or_none()
+
+
+async def get_latest_domain_selectors(session: AsyncSession, domain: str) -> dict | None:
+    """Retrieve the most recently verified selectors for a domain, whatever its page signature."""
+    result = await session.execute(_SELECT_LATEST_DOMAIN_SELECTORS, {"domain": domain})
+    return result.scalar_one_or_none()
 
 
 async def save_cached_selectors(
-    session: AsyncSession, domain: str, page_signature: str, selectors: dict
+    session: AsyncSession,
+    domain: str,
+    page_signature: str,
+    selectors: dict,
+    raw_hash: str | None = None,
 ) -> None:
     """Save or update cached CSS selectors for a domain."""
-    stmt = pg_insert(LLMPatternCache).values(
-        domain=domain,
-        page_signature=page_signature,
-        selectors=selectors,
-        verified_at=datetime.now(timezone.utc),
-    )
-    stmt = stmt.on_conflict_do_update(
-        constraint="uq_domain_signature",
-        set_={
-            "selectors": stmt.excluded.selectors,
-            "verified_at": stmt.excluded.verified_at,
+    await session.execute(
+        _UPSERT_CACHED_SELECTORS,
+        {
+            "domain": domain,
+            "page_signature": page_signature,
+            "raw_hash": raw_hash,
+            "selectors": selectors,
+            "verified_at": datetime.now(timezone.utc),
         },
     )
-    await session.execute(stmt)
     await session.commit()
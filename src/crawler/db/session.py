@@ -8,8 +8,12 @@ from crawler.settings import settings
 engine = create_async_engine(
     settings.database_url,
     echo=False,
-    pool_size=5,
-    max_overflow=10,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_pool_size * 2,
+    pool_timeout=5,
+    pool_recycle=3600,
+    pool_pre_ping=False,
+    isolation_level="READ COMMITTED",
 )
 
 async_session_factory = async_sessionmaker(
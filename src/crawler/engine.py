@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections.abc import Awaitable
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Any
-from urllib.parse import urlparse
-
-from sqlalchemy.ext.asyncio import AsyncSession
+from urllib.parse import quote_plus, urlparse
 
 from crawler.db.queries import (
     create_crawl_run,
@@ -21,6 +23,18 @@ from crawler.settings import load_search_config, settings
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1024)
+def _build_page_url(url_template: str, keyword: str, location: str) -> str:
+    """Substitute the URL-encoded keyword and location into a career page URL template."""
+    return url_template.format(keyword=quote_plus(keyword), location=quote_plus(location))
+
+
+@lru_cache(maxsize=256)
+def _template_domain(url_template: str) -> str:
+    """Get the domain of a URL template; placeholders only ever appear in the path/query."""
+    return urlparse(url_template).netloc
+
+
 class CrawlEngine:
     """Orchestrates the full crawl pipeline: config → search → dedupe → store."""
 
@@ -30,11 +44,32 @@ class CrawlEngine:
         self.cached_extractor = CachedLLMExtractor(self.llm_extractor)
         self.config = load_search_config()
 
+    async def aclose(self) -> None:
+        """Release network resources held by the fetcher."""
+        await self.fetcher.aclose()
+
     async def run_full_crawl(self) -> dict[str, Any]:
-        """Execute a full crawl based on the search config."""
+        """Execute a full crawl based on the search config.
+
+        Every (keyword, location) job board search and company page crawl runs
+        concurrently, bounded globally by ``max_concurrent_crawls`` and per
+        domain by ``max_concurrent_per_domain`` so throttling still holds.
+        """
         searches = self.config.get("searches", [])
         total_stats = {"new": 0, "updated": 0, "unchanged": 0, "error": 0}
 
+        crawl_limit = asyncio.Semaphore(settings.max_concurrent_crawls)
+        domain_limits: dict[str, asyncio.Semaphore] = {}
+
+        async def _bounded(domain: str, crawl: Awaitable[dict[str, int]]) -> dict[str, int]:
+            domain_limit = domain_limits.get(domain)
+            if domain_limit is None:
+                domain_limit = domain_limits[domain] = asyncio.Semaphore(settings.max_concurrent_per_domain)
+            # Take the domain slot first so waiting on a busy domain doesn't hold a global slot
+            async with domain_limit, crawl_limit:
+                return await crawl
+
+        tasks = []
         for search_block in searches:
             keywords = search_block.get("keywords", [])
             locations = search_block.get("locations", [""])
@@ -45,61 +80,83 @@ class CrawlEngine:
                 for location in locations:
                     # Crawl job boards via JobSpy
                     if job_boards:
-                        stats = await self._crawl_job_boards(keyword, location, job_boards)
-                        for k, v in stats.items():
-                            total_stats[k] = total_stats.get(k, 0) + v
+                        tasks.append(_bounded("jobspy", self._crawl_job_boards(keyword, location, job_boards)))
 
                     # Crawl company career pages
                     for page_config in company_pages:
-                        stats = await self._crawl_company_page(keyword, location, page_config)
-                        for k, v in stats.items():
-                            total_stats[k] = total_stats.get(k, 0) + v
+                        domain = _template_domain(page_config.get("url", ""))
+                        tasks.append(_bounded(domain, self._crawl_company_page(keyword, location, page_config)))
+
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, BaseException):
+                logger.error("Crawl task failed", exc_info=result)
+                total_stats["error"] += 1
+                continue
+            for k, v in result.items():
+                total_stats[k] = total_stats.get(k, 0) + v
 
         logger.info("Full crawl complete: %s", total_stats)
         return total_stats
 
-    async def _crawl_job_boards(
-        self, keyword: str, location: str, sites: list[str]
+    async def _store_results(
+        self, keyword: str, source: str, started_at: datetime, jobs: list[dict[str, Any]]
     ) -> dict[str, int]:
-        """Crawl job boards using JobSpy adapter."""
-        async with async_session_factory() as session:
-            run = await create_crawl_run(session, keyword, source="jobspy")
-
-            try:
-                # JobSpy is synchronous, run it directly
-                jobs = search_job_boards(
-                    keyword=keyword,
-                    location=location,
-                    sites=sites,
-                )
-
-                if not jobs:
-                    await finish_crawl_run(session, run.id, status="completed", new_count=0)
-                    return {"new": 0, "updated": 0, "unchanged": 0}
+        """Record a completed crawl run and upsert its jobs in a single transaction."""
+        async with async_session_factory() as session, session.begin():
+            run_id = await create_crawl_run(session, keyword, source, started_at=started_at)
 
+            counts = {"new": 0, "updated": 0, "unchanged": 0}
+            if jobs:
                 counts = await upsert_job_postings_batch(session, jobs)
 
-                await finish_crawl_run(
-                    session,
-                    run.id,
-                    status="completed",
-                    new_count=counts.get("new", 0),
-                    updated_count=counts.get("updated", 0),
-                    error_count=counts.get("error", 0),
-                )
-
-                logger.info(
-                    "JobSpy crawl done: keyword=%r, location=%r, results=%s",
-                    keyword, location, counts,
-                )
-                return counts
+            await finish_crawl_run(
+                session,
+                run_id,
+                status="completed",
+                new_count=counts.get("new", 0),
+                updated_count=counts.get("updated", 0),
+                error_count=counts.get("error", 0),
+            )
+        return counts
+
+    async def _record_failed_run(
+        self, keyword: str, source: str, started_at: datetime, error_message: str
+    ) -> None:
+        """Record a failed crawl run in its own transaction."""
+        try:
+            async with async_session_factory() as session, session.begin():
+                run_id = await create_crawl_run(session, keyword, source, started_at=started_at)
+                await finish_crawl_run(session, run_id, status="failed", error_message=error_message)
+        except Exception:
+            logger.exception("Failed to record failed crawl run: keyword=%r, source=%s", keyword, source)
 
-            except Exception as e:
-                logger.exception("JobSpy crawl failed: keyword=%r", keyword)
-                await finish_crawl_run(
-                    session, run.id, status="failed", error_message=str(e)
-                )
-                return {"error": 1}
+    async def _crawl_job_boards(
+        self, keyword: str, location: str, sites: list[str]
+    ) -> dict[str, int]:
+        """Crawl job boards using JobSpy adapter."""
+        started_at = datetime.now(timezone.utc)
+
+        try:
+            # JobSpy is synchronous, run it in a worker thread so other crawls keep going
+            jobs = await asyncio.to_thread(
+                search_job_boards,
+                keyword=keyword,
+                location=location,
+                sites=sites,
+            )
+
+            counts = await self._store_results(keyword, "jobspy", started_at, jobs)
+
+            logger.info(
+                "JobSpy crawl done: keyword=%r, location=%r, results=%s",
+                keyword, location, counts,
+            )
+            return counts
+
+        except Exception as e:
+            logger.exception("JobSpy crawl failed: keyword=%r", keyword)
+            await self._record_failed_run(keyword, "jobspy", started_at, str(e))
+            return {"error": 1}
 
     async def _crawl_company_page(
         self, keyword: str, location: str, page_config: dict
@@ -108,57 +165,37 @@ class CrawlEngine:
         url_template = page_config.get("url", "")
         js_render = page_config.get("js_render", False)
 
-        # Substitute keyword and location into URL template
-        url = url_template.format(
-            keyword=keyword.replace(" ", "+"),
-            location=location.replace(" ", "+").replace(",", "%2C"),
-        )
-
-        domain = urlparse(url).netloc
+        url = _build_page_url(url_template, keyword, location)
+        domain = _template_domain(url_template)
         source_name = domain
+        started_at = datetime.now(timezone.utc)
+
+        try:
+            # Fetch the page, waiting on the known job list selector when rendering JS
+            ready_selector = None
+            if js_render:
+                async with async_session_factory() as session:
+                    ready_selector = await self.cached_extractor.ready_selector(session, domain)
+            html = await self.fetcher.fetch(url, js_render=js_render, ready_selector=ready_selector)
+            if not html:
+                await self._record_failed_run(keyword, source_name, started_at, f"Failed to fetch {url}")
+                return {"error": 1}
 
-        async with async_session_factory() as session:
-            run = await create_crawl_run(session, keyword, source=source_name)
-
-            try:
-                # Fetch the page
-                html = await self.fetcher.fetch(url, js_render=js_render)
-                if not html:
-                    await finish_crawl_run(
-                        session, run.id, status="failed",
-                        error_message=f"Failed to fetch {url}",
-                    )
-                    return {"error": 1}
-
-                # Extract jobs using cached LLM extractor
+            # Extract jobs using cached LLM extractor
+            async with async_session_factory() as session:
                 jobs = await self.cached_extractor.extract(
                     session, html, url, keyword
                 )
 
-                if not jobs:
-                    await finish_crawl_run(session, run.id, status="completed", new_count=0)
-                    return {"new": 0, "updated": 0, "unchanged": 0}
-
-                counts = await upsert_job_postings_batch(session, jobs)
-
-                await finish_crawl_run(
-                    session,
-                    run.id,
-                    status="completed",
-                    new_count=counts.get("new", 0),
-                    updated_count=counts.get("updated", 0),
-                    error_count=counts.get("error", 0),
-                )
+            counts = await self._store_results(keyword, source_name, started_at, jobs)
 
-                logger.info(
-                    "Company page crawl done: %s, keyword=%r, results=%s",
-                    domain, keyword, counts,
-                )
-                return counts
+            logger.info(
+                "Company page crawl done: %s, keyword=%r, results=%s",
+                domain, keyword, counts,
+            )
+            return counts
 
-            except Exception as e:
-                logger.exception("Company page crawl failed: %s", url)
-                await finish_crawl_run(
-                    session, run.id, status="failed", error_message=str(e)
-                )
-                return {"error": 1}
+        except Exception as e:
+            logger.exception("Company page crawl failed: %s", url)
+            await self._record_failed_run(keyword, source_name, started_at, str(e))
+            return {"error": 1}
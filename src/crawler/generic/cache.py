@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+from urllib.parse import urlparse
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from crawler.db.queries import get_cached_selectors, save_cached_selectors
+from crawler.db.queries import (
+    get_cached_selectors,
+    get_cached_selectors_by_raw,
+    get_latest_domain_selectors,
+    save_cached_selectors,
+)
 from crawler.generic.extractor import (
     LLMExtractor,
     compute_page_signature,
+    compute_raw_hash,
     extract_with_selectors,
 )
 
@@ -19,11 +27,21 @@ class CachedLLMExtractor:
 
     On first visit to a domain/layout, calls the LLM and caches the selectors.
     On subsequent visits, tries cached selectors first and only falls back to
-    the LLM if the cached selectors return no results.
+    the LLM if the cached selectors return no results. Byte-identical HTML is
+    matched by its raw hash before the page signature is computed at all.
     """
 
     def __init__(self, extractor: LLMExtractor):
         self.extractor = extractor
+        # domain -> job_list_selector (None if the domain has no cached selectors yet)
+        self._ready_selectors: dict[str, str | None] = {}
+
+    async def ready_selector(self, session: AsyncSession, domain: str) -> str | None:
+        """Return the cached job list selector for a domain, for use as a JS render wait condition."""
+        if domain not in self._ready_selectors:
+            selectors = await get_latest_domain_selectors(session, domain)
+            self._ready_selectors[domain] = selectors.get("job_list_selector") if selectors else None
+        return self._ready_selectors[domain]
 
     async def extract(
         self,
@@ -33,32 +51,39 @@ class CachedLLMExtractor:
         keyword: str,
     ) -> list[dict]:
         """Extract job postings, using cached selectors when available."""
-        from urllib.parse import urlparse
-
         domain = urlparse(page_url).netloc
-        page_sig = compute_page_signature(html)
+        raw_hash = compute_raw_hash(html)
+
+        # Try cached selectors first: exact HTML match, then same page structure
+        page_sig = None
+        cached = await get_cached_selectors_by_raw(session, domain, raw_hash)
+        if cached is None:
+            page_sig = compute_page_signature(html, raw_hash=raw_hash)
+            cached = await get_cached_selectors(session, domain, page_sig)
+        # End the read transaction so the pooled connection isn't held idle in
+        # transaction while selectors are applied or the LLM is called
+        await session.commit()
 
-        # Try cached selectors first
-        cached = await get_cached_selectors(session, domain, page_sig)
         if cached:
             logger.info("Using cached selectors for %s", domain)
-            jobs = extract_with_selectors(html, cached, page_url)
+            jobs = extract_with_selectors(html, cached, page_url, keyword)
             if jobs:
-                # Enrich with keyword and source_site
-                for job in jobs:
-                    job["search_keyword"] = keyword
-                    job["source_site"] = domain
                 logger.info("Cached selectors extracted %d jobs from %s", len(jobs), domain)
                 return jobs
             else:
                 logger.info("Cached selectors returned no results for %s, falling back to LLM", domain)
 
-        # Fall back to LLM extraction
-        jobs, selectors = self.extractor.extract_jobs_from_html(html, page_url, keyword)
+        # Fall back to LLM extraction; the model call blocks, so keep it off the event loop
+        jobs, selectors = await asyncio.to_thread(
+            self.extractor.extract_jobs_from_html, html, page_url, keyword
+        )
 
         # Cache the selectors for future use
         if selectors:
-            await save_cached_selectors(session, domain, page_sig, selectors)
+            if page_sig is None:
+                page_sig = compute_page_signature(html, raw_hash=raw_hash)
+            await save_cached_selectors(session, domain, page_sig, selectors, raw_hash=raw_hash)
+            self._ready_selectors[domain] = selectors.get("job_list_selector")
             logger.info("Cached new selectors for %s", domain)
 
         return jobs
@@ -4,11 +4,16 @@ import hashlib
 import json
 import logging
 import re
+from collections import OrderedDict
+from collections.abc import Iterator
+from functools import lru_cache, partial
+from itertools import islice
 from typing import Any
-from urllib.parse import urlparse
+from urllib.parse import urljoin, urlparse
 
-from bs4 import BeautifulSoup
+import orjson
 from langchain.messages import HumanMessage, SystemMessage
+from selectolax.lexbor import LexborHTMLParser
 
 from crawler.db.queries import compute_content_hash
 
@@ -91,23 +96,58 @@ def _create_llm_model(model_key: str = "gpt4omini"):
     )
 
 
-def clean_html(raw_html: str, max_length: int = 50000) -> str:
-    """Clean HTML to reduce token usage: remove scripts, styles, and compress whitespace."""
-    soup = BeautifulSoup(raw_html, "lxml")
+# How much raw HTML (as a multiple of max_length) clean_html parses; markup shrinks a lot once cleaned
+_RAW_HTML_BUDGET_FACTOR = 4
 
-    # Remove non-content elements
-    for tag in soup(["script", "style", "noscript", "svg", "path", "meta", "link", "head"]):
-        tag.decompose()
+_BODY_OPEN_RE = re.compile(r"<body\b", re.IGNORECASE)
+_PARTIAL_TAG_TAIL_RE = re.compile(r"<[^>]*\Z")
 
-    # Remove hidden elements
-    for tag in soup.find_all(attrs={"style": re.compile(r"display\s*:\s*none")}):
-        tag.decompose()
+# Non-content blocks (with their contents) and void tags removed by the regex path
+_NON_CONTENT_BLOCK_RE = re.compile(
+    # The lookahead keeps custom elements like <svg-icon> from matching; a
+    # self-closing start tag is an empty element with no closing tag to find
+    r"<(script|style|noscript|svg|head)(?=[\s/>])(?:[^>]*/>|[^>]*>.*?</\1\s*>)",
+    re.IGNORECASE | re.DOTALL,
+)
+# A block the budget cut left open: its start tag with no matching close before the end
+_OPEN_BLOCK_TAIL_RE = re.compile(
+    r"<(script|style|noscript|svg)(?=[\s/>])[^>]*(?<!/)>(?:(?!</\1\s*>).)*\Z",
+    re.IGNORECASE | re.DOTALL,
+)
+_NON_CONTENT_VOID_RE = re.compile(r"<(?:meta|link)\b[^>]*>", re.IGNORECASE)
+_HIDDEN_STYLE_RE = re.compile(r"display\s*:\s*none")
 
-    # Get cleaned HTML
-    cleaned = str(soup.body) if soup.body else str(soup)
 
-    # Compress whitespace
-    cleaned = re.sub(r"\s+", " ", cleaned)
+def clean_html(raw_html: str, max_length: int = 50000, strict: bool = False) -> str:
+    """Clean HTML to reduce token usage: remove scripts, styles, and compress whitespace.
+
+    By default non-content blocks are stripped with a regex pass, no parse tree
+    is built. ``strict=True`` parses the page instead, which also drops
+    ``display:none`` elements and copes with malformed markup.
+    """
+    # Only parse the start of <body>: the head is dropped anyway and anything past
+    # the budget would be truncated, so parser work scales with output size
+    body_match = _BODY_OPEN_RE.search(raw_html)
+    start = body_match.start() if body_match else 0
+    end = start + max_length * _RAW_HTML_BUDGET_FACTOR
+    cut = end < len(raw_html)
+    if cut:
+        # The cut can land inside a tag; drop the partial tag rather than emit it
+        raw_html = _PARTIAL_TAG_TAIL_RE.sub("", raw_html[start:end])
+    else:
+        raw_html = raw_html[start:]
+
+    if strict:
+        cleaned = _clean_html_tree(raw_html)
+    else:
+        cleaned = _NON_CONTENT_BLOCK_RE.sub("", raw_html)
+        if cut:
+            # The cut can also land inside a script or style body; don't leak its text
+            cleaned = _OPEN_BLOCK_TAIL_RE.sub("", cleaned)
+        cleaned = _NON_CONTENT_VOID_RE.sub("", cleaned)
+
+    # Compress whitespace with str.split's C-level scanner
+    cleaned = " ".join(cleaned.split())
 
     # Truncate if too long
     if len(cleaned) > max_length:
@@ -116,85 +156,200 @@ def clean_html(raw_html: str, max_length: int = 50000) -> str:
     return cleaned
 
 
-def compute_page_signature(html: str) -> str:
+def _clean_html_tree(raw_html: str) -> str:
+    tree = LexborHTMLParser(raw_html)
+
+    # Remove non-content elements
+    tree.strip_tags(["script", "style", "noscript", "svg", "path", "meta", "link", "head"], recursive=True)
+
+    # Remove hidden elements
+    for node in tree.css("[style]"):
+        if _HIDDEN_STYLE_RE.search(node.attributes.get("style") or ""):
+            node.decompose()
+
+    # Get cleaned HTML; Lexbor serializes in C, so this is one call with no Python tree walk
+    body = tree.body
+    return body.html if body is not None else tree.html
+
+
+# Signatures of recently seen pages, keyed by the raw HTML hash
+_SIGNATURE_CACHE_SIZE = 512
+_signature_cache: OrderedDict[str, str] = OrderedDict()
+
+
+def compute_raw_hash(html: str) -> str:
+    """Hash the raw HTML bytes, identifying byte-identical fetches of a page."""
+    return hashlib.blake2b(html.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def compute_page_signature(html: str, raw_hash: str | None = None) -> str:
     """Compute a structural signature of the page for cache lookup.
 
     Uses the DOM structure (tag hierarchy) rather than content to identify
-    pages with the same layout.
+    pages with the same layout. Byte-identical pages (retries, repeated
+    pagination) are served from an LRU without re-parsing. Pass ``raw_hash``
+    if the caller already computed it.
     """
-    soup = BeautifulSoup(html, "lxml")
+    key = raw_hash or compute_raw_hash(html)
+    signature = _signature_cache.get(key)
+    if signature is not None:
+        _signature_cache.move_to_end(key)
+        return signature
 
+    signature = _structural_signature(html)
+    _signature_cache[key] = signature
+    if len(_signature_cache) > _SIGNATURE_CACHE_SIZE:
+        _signature_cache.popitem(last=False)
+    return signature
+
+
+# Start tags and their class attribute, for the structural signature. A regex
+# scan of the raw markup is enough here; building a DOM just to read 200 tags isn't.
+_SIGNATURE_SCAN_CHARS = 200_000
+_START_TAG_RE = re.compile(r"<([a-zA-Z][a-zA-Z0-9-]*)([^>]*)>")
+_CLASS_ATTR_RE = re.compile(r"""\sclass\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+
+
+def _structural_signature(html: str) -> str:
     # Extract structural elements: tag names and class attributes
     structure_parts = []
-    for tag in soup.find_all(True, limit=200):
-        classes = ".".join(sorted(tag.get("class", [])))
-        structure_parts.append(f"{tag.name}:{classes}")
+    for match in islice(_START_TAG_RE.finditer(html, 0, _SIGNATURE_SCAN_CHARS), 200):
+        tag, attrs = match.groups()
+        class_match = _CLASS_ATTR_RE.search(attrs) if attrs else None
+        if class_match is None:
+            structure_parts.append(f"{tag.lower()}:")
+            continue
+        classes = "".join(class_match.groups(default="")).split()
+        structure_parts.append(f"{tag.lower()}:{'.'.join(sorted(classes))}")
 
-    signature = "|".join(structure_parts)
-    return hashlib.md5(signature.encode()).hexdigest()
+    # One joined update beats per-token h.update() calls in CPython
+    return hashlib.blake2b("|".join(structure_parts).encode("utf-8"), digest_size=16).hexdigest()
 
 
-def extract_with_selectors(html: str, selectors: dict, base_url: str) -> list[dict[str, Any]]:
-    """Extract job postings using cached CSS selectors."""
-    soup = BeautifulSoup(html, "lxml")
-    domain = urlparse(base_url).netloc
+def _clean_text(text: str) -> str:
+    """Collapse all whitespace runs (including inside the text) to single spaces."""
+    return " ".join(text.split())
 
-    job_list_sel = selectors.get("job_list_selector", "")
-    if not job_list_sel:
-        return []
 
-    try:
-        job_cards = soup.select(job_list_sel)
-    except Exception:
-        return []
-    if not job_cards:
-        return []
-
-    def _safe_select_one(el, selector: str | None):
-        if not selector:
+# Field order of the job rows built by SelectorExtractor
+_JOB_KEYS = ("title", "company", "location", "salary_range", "description", "source_url", "posted_date")
+_JOB_KEYS_WITH_SOURCE = (*_JOB_KEYS, "search_keyword", "source_site")
+
+# Order matches the positional lookups in SelectorExtractor.extract
+_FIELD_SELECTOR_KEYS = (
+    "title_selector",
+    "company_selector",
+    "location_selector",
+    "url_selector",
+    "salary_selector",
+)
+
+
+class SelectorExtractor:
+    """Extracts job postings with one cached selector dict.
+
+    Field selectors are resolved once per instance. One that fails to parse is
+    dropped for every later card and page instead of raising each time.
+    """
+
+    def __init__(self, selectors: dict):
+        self.job_list_selector = selectors.get("job_list_selector") or None
+        self._field_selectors = [selectors.get(key) or None for key in _FIELD_SELECTOR_KEYS]
+
+    def _select_one(self, el, i: int):
+        selector = self._field_selectors[i]
+        if selector is None:
             return None
         try:
-            return el.select_one(selector)
+            return el.css_first(selector)
         except Exception:
+            self._field_selectors[i] = None
             return None
 
-    jobs = []
-    for card in job_cards:
-        title_el = _safe_select_one(card, selectors.get("title_selector"))
-        company_el = _safe_select_one(card, selectors.get("company_selector"))
-        location_el = _safe_select_one(card, selectors.get("location_selector"))
-        url_el = _safe_select_one(card, selectors.get("url_selector"))
-        salary_el = _safe_select_one(card, selectors.get("salary_selector"))
+    def extract(self, html: str, base_url: str, keyword: str | None = None) -> list[dict[str, Any]]:
+        """Extract jobs from a page. With ``keyword``, rows also carry search_keyword and source_site."""
+        return list(self.iter_extract(html, base_url, keyword))
 
-        title = title_el.get_text(strip=True) if title_el else ""
-        if not title:
-            continue
+    def iter_extract(
+        self, html: str, base_url: str, keyword: str | None = None
+    ) -> Iterator[dict[str, Any]]:
+        """Yield jobs card by card, so callers that stop early skip the remaining cards."""
+        if not self.job_list_selector:
+            return
+
+        tree = LexborHTMLParser(html)
+        try:
+            job_cards = tree.css(self.job_list_selector)
+        except Exception:
+            return
+
+        domain = urlparse(base_url).netloc
+        # Per-call cache: cards often repeat hrefs, and nothing leaks across pages
+        join_url = lru_cache(maxsize=None)(partial(urljoin, base_url))
+
+        # Fill the per-page fields while building rows rather than patching dicts afterwards
+        keys, source = (_JOB_KEYS, ()) if keyword is None else (_JOB_KEYS_WITH_SOURCE, (keyword, domain))
+
+        for card in job_cards:
+            title_el = self._select_one(card, 0)
+            company_el = self._select_one(card, 1)
+            location_el = self._select_one(card, 2)
+            url_el = self._select_one(card, 3)
+            salary_el = self._select_one(card, 4)
+
+            title = _clean_text(title_el.text()) if title_el else ""
+            if not title:
+                continue
+
+            company = _clean_text(company_el.text()) if company_el else domain
+            location = _clean_text(location_el.text()) if location_el else None
+            salary = _clean_text(salary_el.text()) if salary_el else None
+
+            # Resolve job URL (relative, root-relative or protocol-relative hrefs)
+            job_url = ""
+            if url_el:
+                href = url_el.attributes.get("href") or ""
+                if href and not href.startswith("#"):
+                    job_url = join_url(href)
+                    # Drop javascript:, mailto: and similar non-page links
+                    if not job_url.startswith("http"):
+                        job_url = ""
+
+            yield dict(zip(keys, (title, company, location, salary, "", job_url, None, *source)))
 
-        company = company_el.get_text(strip=True) if company_el else domain
-        location = location_el.get_text(strip=True) if location_el else None
-        salary = salary_el.get_text(strip=True) if salary_el else None
-
-        # Resolve job URL
-        job_url = ""
-        if url_el:
-            href = url_el.get("href", "")
-            if href.startswith("http"):
-                job_url = href
-            elif href.startswith("/"):
-                parsed = urlparse(base_url)
-                job_url = f"{parsed.scheme}://{parsed.netloc}{href}"
-
-        jobs.append({
-            "title": title,
-            "company": company,
-            "location": location,
-            "salary_range": salary,
-            "description": "",
-            "source_url": job_url,
-            "posted_date": None,
-        })
-
-    return jobs
+
+@lru_cache(maxsize=256)
+def _selector_extractor(selector_items: frozenset) -> SelectorExtractor:
+    return SelectorExtractor(dict(selector_items))
+
+
+def _get_selector_extractor(selectors: dict) -> SelectorExtractor:
+    try:
+        return _selector_extractor(frozenset(selectors.items()))
+    except TypeError:
+        # Unhashable values (e.g. a list from a malformed LLM response): don't cache
+        return SelectorExtractor(selectors)
+
+
+def iter_jobs(
+    html: str, selectors: dict, base_url: str, keyword: str | None = None
+) -> Iterator[dict[str, Any]]:
+    """Lazily extract job postings using cached CSS selectors; see extract_with_selectors.
+
+    Use with itertools.islice when only the first few jobs are needed.
+    """
+    return _get_selector_extractor(selectors).iter_extract(html, base_url, keyword)
+
+
+def extract_with_selectors(
+    html: str, selectors: dict, base_url: str, keyword: str | None = None
+) -> list[dict[str, Any]]:
+    """Extract job postings using cached CSS selectors.
+
+    If ``keyword`` is given, each job also gets ``search_keyword`` and
+    ``source_site`` (the page's domain).
+    """
+    return _get_selector_extractor(selectors).extract(html, base_url, keyword)
 
 
 class LLMExtractor:
@@ -211,6 +366,55 @@ class LLMExtractor:
             self._model = _create_llm_model(self.model_key)
         return self._model
 
+    @staticmethod
+    def _extraction_messages(html: str, page_url: str, keyword: str) -> list:
+        """Build the extraction prompt for one page.
+
+        The system prompt is kept byte-identical and first so providers can
+        serve it from their prompt prefix cache across pages.
+        """
+        cleaned = clean_html(html)
+        return [
+            SystemMessage(content=EXTRACTION_SYSTEM_PROMPT),
+            HumanMessage(content=f"URL: {page_url}\nSearch keyword: {keyword}\n\nHTML:\n{cleaned}"),
+        ]
+
+    @staticmethod
+    def _parse_extraction(
+        content: str, page_url: str, keyword: str
+    ) -> tuple[list[dict[str, Any]], dict | None]:
+        """Parse and normalize an extraction response. Raises json.JSONDecodeError on bad JSON.
+
+        orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can keep
+        catching the stdlib type.
+        """
+        data = orjson.loads(content)
+        jobs = data.get("jobs", [])
+        selectors = data.get("selectors")
+
+        # Normalize jobs
+        source_site = urlparse(page_url).netloc
+        normalized = []
+        for job in jobs:
+            source_url = job.get("job_url", job.get("source_url", ""))
+            if not source_url:
+                continue
+
+            normalized.append({
+                "source_site": source_site,
+                "source_url": source_url,
+                "search_keyword": keyword,
+                "title": job.get("title", ""),
+                "company": job.get("company", ""),
+                "location": job.get("location"),
+                "salary_range": job.get("salary_range"),
+                "description": job.get("description", ""),
+                "posted_date": job.get("posted_date"),
+            })
+
+        logger.info("LLM extracted %d jobs from %s", len(normalized), page_url)
+        return normalized, selectors
+
     def extract_jobs_from_html(
         self, html: str, page_url: str, keyword: str
     ) -> tuple[list[dict[str, Any]], dict | None]:
@@ -220,44 +424,9 @@ class LLMExtractor:
         Returns:
             Tuple of (list of job dicts, selectors dict or None)
         """
-        cleaned = clean_html(html)
-
-        messages = [
-            SystemMessage(content=EXTRACTION_SYSTEM_PROMPT),
-            HumanMessage(content=f"URL: {page_url}\nSearch keyword: {keyword}\n\nHTML:\n{cleaned}"),
-        ]
-
         try:
-            response = self.model.invoke(messages)
-            content = response.content
-
-            # Parse JSON response
-            data = json.loads(content)
-            jobs = data.get("jobs", [])
-            selectors = data.get("selectors")
-
-            # Normalize jobs
-            normalized = []
-            for job in jobs:
-                source_url = job.get("job_url", job.get("source_url", ""))
-                if not source_url:
-                    continue
-
-                normalized.append({
-                    "source_site": urlparse(page_url).netloc,
-                    "source_url": source_url,
-                    "search_keyword": keyword,
-                    "title": job.get("title", ""),
-                    "company": job.get("company", ""),
-                    "location": job.get("location"),
-                    "salary_range": job.get("salary_range"),
-                    "description": job.get("description", ""),
-                    "posted_date": job.get("posted_date"),
-                })
-
-            logger.info("LLM extracted %d jobs from %s", len(normalized), page_url)
-            return normalized, selectors
-
+            response = self.model.invoke(self._extraction_messages(html, page_url, keyword))
+            return self._parse_extraction(response.content, page_url, keyword)
         except json.JSONDecodeError:
             logger.error("LLM returned invalid JSON for %s", page_url)
             return [], None
@@ -265,6 +434,44 @@ class LLMExtractor:
             logger.exception("LLM extraction failed for %s", page_url)
             return [], None
 
+    def extract_jobs_batched(
+        self, pages: list[tuple[str, str, str]], max_concurrency: int = 4
+    ) -> list[tuple[list[dict[str, Any]], dict | None]]:
+        """
+        Extract job postings from several pages through the model's batch API.
+
+        Args:
+            pages: (html, page_url, keyword) tuples
+            max_concurrency: Max requests the model sends at once
+
+        Returns:
+            One (jobs, selectors) tuple per page, in input order
+        """
+        if not pages:
+            return []
+
+        responses = self.model.batch(
+            [self._extraction_messages(html, page_url, keyword) for html, page_url, keyword in pages],
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True,
+        )
+
+        results = []
+        for (_, page_url, keyword), response in zip(pages, responses):
+            if isinstance(response, Exception):
+                logger.error("LLM extraction failed for %s", page_url, exc_info=response)
+                results.append(([], None))
+                continue
+            try:
+                results.append(self._parse_extraction(response.content, page_url, keyword))
+            except json.JSONDecodeError:
+                logger.error("LLM returned invalid JSON for %s", page_url)
+                results.append(([], None))
+            except Exception:
+                logger.exception("LLM extraction failed for %s", page_url)
+                results.append(([], None))
+        return results
+
     def extract_selectors_only(self, html: str) -> dict | None:
         """Use LLM to identify CSS selectors for a career page layout."""
         cleaned = clean_html(html, max_length=30000)
@@ -276,7 +483,7 @@ class LLMExtractor:
 
         try:
             response = self.model.invoke(messages)
-            return json.loads(response.content)
+            return orjson.loads(response.content)
         except Exception:
             logger.exception("LLM selector extraction failed")
             return None
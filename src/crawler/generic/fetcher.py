@@ -1,18 +1,26 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections.abc import AsyncIterator
+from contextlib import AbstractAsyncContextManager, AsyncExitStack, asynccontextmanager
+from functools import lru_cache
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import TYPE_CHECKING
 from urllib.parse import urlparse
 
 import httpx
-from playwright.async_api import async_playwright
-from playwright_stealth import Stealth
 
 from crawler.anti_throttle.circuit import CircuitBreaker
 from crawler.anti_throttle.delays import AdaptiveDelay
 from crawler.anti_throttle.fingerprint import random_headers, random_user_agent, random_viewport
 from crawler.anti_throttle.proxies import ProxyPool
+from crawler.anti_throttle.state import DomainState
 from crawler.settings import settings
 
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Playwright
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,25 +28,120 @@ class StealthFetcher:
     """Fetches web pages with anti-throttling measures.
 
     Uses httpx for static pages and Playwright with stealth for JS-rendered pages.
+    The Chromium browser is launched once on first use; each JS fetch borrows a
+    browser context (with its own UA, viewport and proxy) from a small pool.
     """
 
     def __init__(self, proxy_pool: ProxyPool | None = None):
+        # Delay and circuit breaker share one per-domain state table
+        domain_states: dict[str, DomainState] = {}
         self.delay = AdaptiveDelay(
             min_delay=settings.min_delay,
             max_delay=settings.max_delay,
+            states=domain_states,
         )
         self.circuit = CircuitBreaker(
             threshold=settings.circuit_breaker_threshold,
             cooldown=settings.circuit_breaker_cooldown,
+            states=domain_states,
         )
         self.proxy_pool = proxy_pool or ProxyPool(
             [settings.proxy_url] if settings.proxy_url else []
         )
+        # Per-domain concurrency caps plus a global cap on fetches in flight
+        self._domain_slots: dict[str, asyncio.Semaphore] = {}
+        self._fetch_slots = asyncio.Semaphore(settings.max_concurrent_fetches)
+        # One pooled client per proxy so keep-alive connections are reused across fetches
+        self._clients: dict[str | None, httpx.AsyncClient] = {}
+
+        self._stealth_cm: AbstractAsyncContextManager[Playwright] | None = None
+        self._pw: Playwright | None = None
+        self._browser: Browser | None = None
+        self._browser_lock = asyncio.Lock()
+        self._context_pool: list[BrowserContext] = []
+        self._context_slots = asyncio.Semaphore(settings.browser_context_pool_size)
+
+    async def start(self) -> None:
+        """Start Playwright and launch the shared browser if not already running."""
+        async with self._browser_lock:
+            if self._browser is not None:
+                return
+            # Playwright is imported on first JS fetch so static-only crawls never load it
+            from playwright.async_api import async_playwright
+            from playwright_stealth import Stealth
+
+            # Enter the stealth-wrapped driver once per fetcher; browsers and contexts
+            # created from it get the evasions applied automatically
+            self._stealth_cm = Stealth().use_async(async_playwright())
+            self._pw = await self._stealth_cm.__aenter__()
+            self._browser = await self._pw.chromium.launch(headless=True)
+
+    def _client_for(self, proxy: str | None) -> httpx.AsyncClient:
+        """Return the persistent httpx client for a proxy, creating it on first use.
+
+        The client never stores cookies: each fetch sends a random User-Agent, and
+        replaying anti-bot session cookies under a changing UA gets requests blocked.
+        """
+        client = self._clients.get(proxy)
+        if client is None:
+            client = self._clients[proxy] = httpx.AsyncClient(
+                proxy=proxy,
+                cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+                follow_redirects=True,
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=50),
+            )
+        return client
+
+    async def aclose(self) -> None:
+        """Close all pooled HTTP clients, browser contexts and the browser."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+        contexts = self._context_pool
+        self._context_pool = []
+        for context in contexts:
+            await context.close()
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._stealth_cm is not None:
+            await self._stealth_cm.__aexit__(None, None, None)
+            self._stealth_cm = None
+            self._pw = None
+
+    async def _new_context(self) -> BrowserContext:
+        """Open a stealth browser context with a fresh fingerprint and proxy."""
+        proxy_url = self.proxy_pool.get_random()
+        return await self._browser.new_context(
+            user_agent=random_user_agent(),
+            viewport=random_viewport(),
+            locale="en-US",
+            proxy={"server": proxy_url} if proxy_url else None,
+        )
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def _get_domain(url: str) -> str:
         return urlparse(url).netloc
 
+    @asynccontextmanager
+    async def _fetch_slot(self, domain: str) -> AsyncIterator[None]:
+        """Hold a domain slot (including its politeness delay), then a global fetch slot.
+
+        The delay is slept while only the domain slot is held, so a throttled
+        domain doesn't tie up global capacity that other domains could use.
+        """
+        domain_slot = self._domain_slots.get(domain)
+        if domain_slot is None:
+            domain_slot = self._domain_slots[domain] = asyncio.Semaphore(settings.max_concurrent_per_domain)
+        async with domain_slot:
+            await self.delay.wait(domain)
+            async with self._fetch_slots:
+                yield
+
     async def fetch_static(self, url: str) -> str | None:
         """Fetch a page using httpx (no JS rendering)."""
         domain = self._get_domain(url)
@@ -47,100 +150,167 @@ class StealthFetcher:
             logger.warning("Circuit open for %s, skipping", domain)
             return None
 
-        await self.delay.wait(domain)
-
-        headers = random_headers()
-        proxy = self.proxy_pool.get_random()
-
-        try:
-            async with httpx.AsyncClient(
-                headers=headers,
-                proxy=proxy,
-                follow_redirects=True,
-                timeout=30.0,
-            ) as client:
-                response = await client.get(url)
-
-                if response.status_code in (429, 503):
-                    self.delay.report_error(domain, response.status_code)
-                    self.circuit.record_failure(domain)
-                    logger.warning("HTTP %d from %s", response.status_code, domain)
-                    return None
+        async with self._fetch_slot(domain):
+            client = self._client_for(self.proxy_pool.get_random())
 
-                if response.status_code >= 400:
-                    self.circuit.record_failure(domain)
-                    logger.warning("HTTP %d from %s for %s", response.status_code, domain, url)
+            try:
+                response = await client.get(url, headers=random_headers())
+                if not self._check_status(domain, url, response.status_code):
                     return None
 
                 self.delay.report_success(domain)
                 self.circuit.record_success(domain)
                 return response.text
 
-        except Exception:
-            self.circuit.record_failure(domain)
-            self.delay.report_error(domain)
-            logger.exception("Failed to fetch %s", url)
-            return None
+            except Exception:
+                self.circuit.record_failure(domain)
+                self.delay.report_error(domain)
+                logger.exception("Failed to fetch %s", url)
+                return None
+
+    @asynccontextmanager
+    async def fetch_stream(self, url: str) -> AsyncIterator[AsyncIterator[bytes] | None]:
+        """Open a page for streaming using httpx (no JS rendering).
+
+        Lets callers hash or parse the body while it downloads instead of
+        after the whole page is buffered::
 
-    async def fetch_js(self, url: str) -> str | None:
-        """Fetch a page using Playwright with stealth (for JS-heavy sites)."""
+            async with fetcher.fetch_stream(url) as chunks:
+                if chunks is not None:
+                    async for chunk in chunks:
+                        hasher.update(chunk)
+
+        Yields None if the domain is paused or the server answers with an error
+        status. The fetch slots and the connection are released when the block
+        exits, even if iteration stops early. Transport errors are recorded and
+        re-raised, since the caller may already hold partial data.
+        """
         domain = self._get_domain(url)
 
         if self.circuit.is_open(domain):
             logger.warning("Circuit open for %s, skipping", domain)
-            return None
+            yield None
+            return
 
-        await self.delay.wait(domain)
+        async with self._fetch_slot(domain), AsyncExitStack() as stack:
+            client = self._client_for(self.proxy_pool.get_random())
 
-        proxy_url = self.proxy_pool.get_random()
-        proxy_config = None
-        if proxy_url:
-            proxy_config = {"server": proxy_url}
+            try:
+                response = await stack.enter_async_context(
+                    client.stream("GET", url, headers=random_headers())
+                )
+            except Exception:
+                self._record_stream_failure(domain, url)
+                raise
 
-        viewport = random_viewport()
-        ua = random_user_agent()
+            if not self._check_status(domain, url, response.status_code):
+                yield None
+                return
 
+            yield self._iter_body(domain, url, response)
+
+    async def _iter_body(self, domain: str, url: str, response: httpx.Response) -> AsyncIterator[bytes]:
+        """Yield a streamed response body; success is recorded once it is fully read."""
         try:
-            stealth = Stealth()
-            async with stealth.use_async(async_playwright()) as p:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    proxy=proxy_config,
-                )
-                context = await browser.new_context(
-                    user_agent=ua,
-                    viewport=viewport,
-                    locale="en-US",
-                )
+            async for chunk in response.aiter_bytes():
+                yield chunk
+        except Exception:
+            self._record_stream_failure(domain, url)
+            raise
+
+        self.delay.report_success(domain)
+        self.circuit.record_success(domain)
+
+    def _record_stream_failure(self, domain: str, url: str) -> None:
+        self.circuit.record_failure(domain)
+        self.delay.report_error(domain)
+        logger.exception("Failed to stream %s", url)
+
+    def _check_status(self, domain: str, url: str, status_code: int) -> bool:
+        """Record throttling/failure signals for an HTTP status. Returns True if it is usable."""
+        if status_code in (429, 503):
+            self.delay.report_error(domain, status_code)
+            self.circuit.record_failure(domain)
+            logger.warning("HTTP %d from %s", status_code, domain)
+            return False
+
+        if status_code >= 400:
+            self.circuit.record_failure(domain)
+            logger.warning("HTTP %d from %s for %s", status_code, domain, url)
+            return False
+
+        return True
+
+    async def fetch_js(self, url: str, ready_selector: str | None = None) -> str | None:
+        """Fetch a page using Playwright with stealth (for JS-heavy sites).
+
+        If ``ready_selector`` is given (e.g. the domain's cached job list
+        selector), waits for it to appear instead of sleeping a fixed 2 seconds.
+        """
+        domain = self._get_domain(url)
+
+        if self.circuit.is_open(domain):
+            logger.warning("Circuit open for %s, skipping", domain)
+            return None
+
+        async with self._fetch_slot(domain), self._context_slots:
+            context: BrowserContext | None = None
+            reusable = False
+            try:
+                await self.start()
+                context = self._context_pool.pop() if self._context_pool else await self._new_context()
                 page = await context.new_page()
+                try:
+                    response = await page.goto(url, wait_until="networkidle", timeout=30000)
 
-                response = await page.goto(url, wait_until="networkidle", timeout=30000)
+                    if response and response.status in (429, 503):
+                        self.delay.report_error(domain, response.status)
+                        self.circuit.record_failure(domain)
+                        logger.warning("Playwright HTTP %d from %s", response.status, domain)
+                        return None
 
-                if response and response.status in (429, 503):
-                    self.delay.report_error(domain, response.status)
-                    self.circuit.record_failure(domain)
-                    logger.warning("Playwright HTTP %d from %s", response.status, domain)
-                    await browser.close()
-                    return None
+                    if ready_selector:
+                        from playwright.async_api import Error as PlaywrightError
+                        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
-                # Wait a bit for dynamic content to load
-                await page.wait_for_timeout(2000)
+                        try:
+                            await page.wait_for_selector(ready_selector, state="attached", timeout=5000)
+                        except PlaywrightTimeoutError:
+                            logger.debug("Ready selector %r not found on %s", ready_selector, url)
+                        except PlaywrightError:
+                            # e.g. a cached selector Playwright can't parse; the page itself is fine
+                            logger.warning("Unusable ready selector %r for %s", ready_selector, url)
+                            ready_selector = None
+                    if not ready_selector:
+                        # Unknown layout or unusable selector: wait a bit for dynamic content to load
+                        await page.wait_for_timeout(2000)
 
-                html = await page.content()
-                await browser.close()
+                    html = await page.content()
+                finally:
+                    await page.close()
 
+                reusable = True
                 self.delay.report_success(domain)
                 self.circuit.record_success(domain)
                 return html
 
-        except Exception:
-            self.circuit.record_failure(domain)
-            self.delay.report_error(domain)
-            logger.exception("Playwright failed for %s", url)
-            return None
+            except Exception:
+                self.circuit.record_failure(domain)
+                self.delay.report_error(domain)
+                logger.exception("Playwright failed for %s", url)
+                return None
+
+            finally:
+                # Throttled or failed contexts are discarded so the next fetch gets a new fingerprint
+                if reusable:
+                    self._context_pool.append(context)
+                elif context is not None:
+                    await context.close()
 
-    async def fetch(self, url: str, js_render: bool = False) -> str | None:
+    async def fetch(
+        self, url: str, js_render: bool = False, ready_selector: str | None = None
+    ) -> str | None:
         """Fetch a URL, choosing static or JS rendering based on config."""
         if js_render:
-            return await self.fetch_js(url)
+            return await self.fetch_js(url, ready_selector=ready_selector)
         return await self.fetch_static(url)
@@ -3,12 +3,16 @@ from __future__ import annotations
 import logging
 from typing import Any
 
-from jobspy import scrape_jobs
+import pandas as pd
 
 from crawler.db.queries import compute_content_hash
 
 logger = logging.getLogger(__name__)
 
+# jobspy.scrape_jobs, imported on the first search (JobSpy pulls in its scraper stack
+# on import). Kept as a module attribute so it is resolved once and can be patched.
+scrape_jobs = None
+
 # Map our config names to JobSpy site_name values
 SITE_NAME_MAP = {
     "indeed": "indeed",
@@ -18,6 +22,51 @@ SITE_NAME_MAP = {
 }
 
 
+# Output columns whose values repeat across most rows of a search
+_REPEATED_VALUE_COLUMNS = ("source_site", "company", "location")
+
+
+def _text_column(df: pd.DataFrame, name: str, default: str = "") -> pd.Series:
+    """Return a column as strings, with missing values (or a missing column) replaced by ``default``."""
+    if name not in df:
+        return pd.Series(default, index=df.index, dtype=object)
+    return df[name].astype(object).where(df[name].notna(), default).astype(str)
+
+
+def _salary_ranges(df: pd.DataFrame) -> pd.Series:
+    """Format salary range strings column-wise, e.g. "$150,000 - $200,000 (yearly)"."""
+    salary = pd.Series([None] * len(df), index=df.index, dtype=object)
+    if "min_amount" not in df:
+        return salary
+
+    min_amount = pd.to_numeric(df["min_amount"], errors="coerce")
+    max_amount = pd.to_numeric(df.get("max_amount", pd.Series(index=df.index, dtype=float)), errors="coerce")
+    min_ok = min_amount.notna()
+    both_ok = min_ok & max_amount.notna()
+    min_only = min_ok & ~both_ok
+
+    # Each mask selects disjoint rows, so every row is formatted exactly once
+    min_text = "$" + min_amount[min_ok].map("{:,.0f}".format)
+    salary[min_only] = min_text[min_only] + "+"
+    salary[both_ok] = min_text[both_ok] + " - $" + max_amount[both_ok].map("{:,.0f}".format)
+
+    if "interval" in df:
+        with_interval = min_ok & df["interval"].notna()
+        salary[with_interval] = salary[with_interval] + " (" + df["interval"][with_interval].astype(str) + ")"
+    # Masked string assignment may upcast to a string dtype, which turns the gaps into NaN
+    return salary.astype(object).where(salary.notna(), None)
+
+
+def _posted_dates(df: pd.DataFrame) -> pd.Series:
+    """Convert the date_posted column to ``datetime.date`` values, None where missing or unparseable."""
+    if "date_posted" not in df:
+        return pd.Series([None] * len(df), index=df.index, dtype=object)
+    # ISO8601 keeps parsing on pandas' C fast path instead of per-value format
+    # inference; cache=True converts each distinct date (usually a handful) once
+    posted = pd.to_datetime(df["date_posted"], format="ISO8601", errors="coerce", cache=True)
+    return posted.dt.date.astype(object).where(posted.notna(), None)
+
+
 def search_job_boards(
     keyword: str,
     location: str,
@@ -37,15 +86,17 @@ def search_job_boards(
         hours_old: Only return jobs posted within this many hours
         country: Country for the search
     """
-    # Map site names
+    # Map site names, dropping duplicates so a site isn't scraped twice
     jobspy_sites = []
-    for site in sites:
+    for site in dict.fromkeys(sites):
         mapped = SITE_NAME_MAP.get(site)
         if mapped:
-            jobspy_sites.append(mapped)
+            if mapped not in jobspy_sites:
+                jobspy_sites.append(mapped)
         else:
             logger.warning("Unknown job board site: %s, skipping", site)
 
+    # Nothing supported: return before touching JobSpy or the network
     if not jobspy_sites:
         logger.warning("No valid job board sites to search")
         return []
@@ -55,6 +106,10 @@ def search_job_boards(
         keyword, location, jobspy_sites, results_wanted,
     )
 
+    global scrape_jobs
+    if scrape_jobs is None:
+        from jobspy import scrape_jobs
+
     try:
         jobs_df = scrape_jobs(
             site_name=jobspy_sites,
@@ -72,56 +127,24 @@ def search_job_boards(
         logger.info("No results from JobSpy for keyword=%r, location=%r", keyword, location)
         return []
 
-    # Normalize DataFrame rows to our JobPosting schema
-    normalized = []
-    for _, row in jobs_df.iterrows():
-        job_url = str(row.get("job_url", ""))
-        if not job_url:
-            continue
-
-        title = str(row.get("title", ""))
-        company = str(row.get("company_name", row.get("company", "")))
-        description = str(row.get("description", ""))
-
-        # Build salary range string from components
-        import pandas as pd
-
-        salary_parts = []
-        min_amount = row.get("min_amount")
-        max_amount = row.get("max_amount")
-        if pd.notna(min_amount) and pd.notna(max_amount):
-            salary_parts.append(f"${min_amount:,.0f} - ${max_amount:,.0f}")
-        elif pd.notna(min_amount):
-            salary_parts.append(f"${min_amount:,.0f}+")
-        interval = row.get("interval")
-        if pd.notna(interval) and salary_parts:
-            salary_parts.append(f"({interval})")
-        salary_range = " ".join(salary_parts) if salary_parts else None
-
-        # Parse posted date
-        posted_date = None
-        date_posted = row.get("date_posted")
-        if pd.notna(date_posted):
-            try:
-                if isinstance(date_posted, pd.Timestamp):
-                    posted_date = date_posted.date()
-                elif hasattr(date_posted, "date"):
-                    posted_date = date_posted.date()
-            except Exception:
-                pass
-
-        job_data = {
-            "source_site": str(row.get("site", "unknown")),
-            "source_url": job_url,
-            "search_keyword": keyword,
-            "title": title,
-            "company": company,
-            "location": str(row.get("location", "")),
-            "salary_range": salary_range,
-            "description": description,
-            "posted_date": posted_date,
-        }
-        normalized.append(job_data)
+    # Normalize DataFrame columns to our JobPosting schema
+    source_url = _text_column(jobs_df, "job_url")
+    company = _text_column(jobs_df, "company_name") if "company_name" in jobs_df else _text_column(jobs_df, "company")
+    normalized_df = pd.DataFrame({
+        "source_site": _text_column(jobs_df, "site", "unknown"),
+        "source_url": source_url,
+        "search_keyword": keyword,
+        "title": _text_column(jobs_df, "title"),
+        "company": company,
+        "location": _text_column(jobs_df, "location"),
+        "salary_range": _salary_ranges(jobs_df),
+        "description": _text_column(jobs_df, "description"),
+        "posted_date": _posted_dates(jobs_df),
+    })
+    # Categoricals make to_dict hand out one shared str per distinct value instead of
+    # a fresh copy per row for these highly repetitive columns
+    normalized_df = normalized_df.astype(dict.fromkeys(_REPEATED_VALUE_COLUMNS, "category"))
+    normalized = normalized_df[source_url != ""].to_dict("records")
 
     logger.info("JobSpy returned %d normalized results for keyword=%r", len(normalized), keyword)
     return normalized
@@ -7,7 +7,6 @@ import sys
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
-from crawler.engine import CrawlEngine
 from crawler.settings import load_search_config, settings
 
 logging.basicConfig(
@@ -20,6 +19,10 @@ logger = logging.getLogger(__name__)
 
 async def run_crawl() -> None:
     """Execute a single crawl run."""
+    # Deferred: the engine pulls in pandas, playwright and the LLM stack, which the
+    # scheduler loop doesn't need until the first run
+    from crawler.engine import CrawlEngine
+
     logger.info("Starting crawl run...")
     engine = CrawlEngine()
     try:
@@ -27,21 +30,21 @@ async def run_crawl() -> None:
         logger.info("Crawl run finished: %s", stats)
     except Exception:
         logger.exception("Crawl run failed")
+    finally:
+        await engine.aclose()
+
+
+_CRON_KEYS = ("minute", "hour", "day", "month", "day_of_week")
 
 
 def parse_cron_expression(cron_str: str) -> dict:
     """Parse a standard cron expression into APScheduler CronTrigger kwargs."""
-    parts = cron_str.strip().split()
+    # maxsplit=5 stops scanning after a sixth field, which is already enough to reject
+    parts = cron_str.split(maxsplit=5)
     if len(parts) != 5:
         raise ValueError(f"Invalid cron expression: {cron_str!r} (expected 5 fields)")
 
-    return {
-        "minute": parts[0],
-        "hour": parts[1],
-        "day": parts[2],
-        "month": parts[3],
-        "day_of_week": parts[4],
-    }
+    return dict(zip(_CRON_KEYS, parts))
 
 
 async def async_main() -> None:
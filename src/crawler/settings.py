@@ -24,6 +24,7 @@ class Settings(BaseSettings):
     llm_model_key: str = "gpt4omini"
     proxy_url: Optional[str] = None
     log_level: str = "INFO"
+    db_pool_size: int = Field(default=20, description="Persistent DB connections kept in the pool")
 
     # Anti-throttle defaults
     min_delay: float = Field(default=2.0, description="Minimum delay between requests (seconds)")
@@ -31,6 +32,9 @@ class Settings(BaseSettings):
     circuit_breaker_threshold: int = Field(default=5, description="Consecutive failures before pausing a domain")
     circuit_breaker_cooldown: float = Field(default=300.0, description="Cooldown in seconds after circuit break")
     max_concurrent_per_domain: int = Field(default=1, description="Max concurrent requests per domain")
+    max_concurrent_fetches: int = Field(default=64, description="Max HTTP/browser fetches in flight across all domains")
+    max_concurrent_crawls: int = Field(default=4, description="Max crawl tasks (searches/pages) run concurrently")
+    browser_context_pool_size: int = Field(default=4, description="Max Playwright browser contexts kept open at once")
 
 
 def load_search_config(path: Path | None = None) -> dict:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import pickle
 from time import monotonic
 
 import pytest
@@ -23,18 +24,25 @@ class TestAdaptiveDelay:
 
     def test_backoff_increases_on_rate_limit(self):
         delay = AdaptiveDelay()
-        assert delay._backoff_factor["test.com"] == 1.0
+        assert delay.get_backoff_factor("test.com") == 1.0
         delay.report_error("test.com", status_code=429)
-        assert delay._backoff_factor["test.com"] == 2.0
+        assert delay.get_backoff_factor("test.com") == 2.0
         delay.report_error("test.com", status_code=429)
-        assert delay._backoff_factor["test.com"] == 4.0
+        assert delay.get_backoff_factor("test.com") == 4.0
 
     def test_backoff_resets_on_success(self):
         delay = AdaptiveDelay()
         delay.report_error("test.com", status_code=429)
         delay.report_error("test.com", status_code=429)
         delay.report_success("test.com")
-        assert delay._backoff_factor["test.com"] < 4.0
+        assert delay.get_backoff_factor("test.com") < 4.0
+
+    def test_state_survives_pickling(self):
+        delay = AdaptiveDelay()
+        delay.report_error("test.com", status_code=429)
+        restored = pickle.loads(pickle.dumps(delay))
+        assert restored.get_backoff_factor("test.com") == 2.0
+        assert restored.get_backoff_factor("other.com") == 1.0
 
 
 class TestCircuitBreaker:
@@ -60,6 +68,16 @@ class TestCircuitBreaker:
         cb.record_failure("test.com")
         assert not cb.is_open("test.com")
 
+    def test_shares_domain_state_with_delay(self):
+        states = {}
+        cb = CircuitBreaker(threshold=1, cooldown=60.0, states=states)
+        delay = AdaptiveDelay(states=states)
+        delay.report_error("test.com", status_code=429)
+        cb.record_failure("test.com")
+        assert list(states) == ["test.com"]
+        assert cb.is_open("test.com")
+        assert delay.get_backoff_factor("test.com") == 2.0
+
 
 class TestProxyPool:
     def test_empty_pool(self):
@@ -81,6 +99,14 @@ class TestProxyPool:
         pool.remove_proxy("http://p1")
         assert pool.get_random() == "http://p2"
 
+    def test_add_proxy_ignores_duplicates(self):
+        pool = ProxyPool(["http://p1", "http://p1"])
+        pool.add_proxy("http://p1")
+        pool.add_proxy("http://p2")
+        pool.remove_proxy("http://p1")
+        assert pool.get_next() == "http://p2"
+        assert pool.get_next() == "http://p2"
+
 
 class TestFingerprint:
     def test_random_user_agent_returns_string(self):
@@ -1,8 +1,19 @@
 from __future__ import annotations
 
+import json
+from itertools import islice
+from unittest.mock import MagicMock
+
 import pytest
 
-from crawler.generic.extractor import clean_html, compute_page_signature, extract_with_selectors
+from crawler.generic import extractor
+from crawler.generic.extractor import (
+    LLMExtractor,
+    clean_html,
+    compute_page_signature,
+    extract_with_selectors,
+    iter_jobs,
+)
 
 
 SAMPLE_HTML = """
@@ -39,12 +50,59 @@ class TestCleanHtml:
         assert "AI Engineer" in cleaned
         assert "TechCorp" in cleaned
 
+    def test_removes_hidden_elements(self):
+        html = '<body><div style="display: none"><p>Hidden</p></div><p style="color:red">Visible</p></body>'
+        cleaned = clean_html(html, strict=True)
+        assert "Hidden" not in cleaned
+        assert "Visible" in cleaned
+
+    def test_strict_removes_scripts_and_styles(self):
+        cleaned = clean_html(SAMPLE_HTML, strict=True)
+        assert "<script" not in cleaned
+        assert "<style" not in cleaned
+        assert "AI Engineer" in cleaned
+
+    def test_custom_elements_are_not_non_content_blocks(self):
+        html = (
+            '<body><head-banner>Careers</head-banner><svg-icon name="search"></svg-icon>'
+            '<div class="job">AI Engineer</div><svg><path d="M0 0"/></svg></body>'
+        )
+        cleaned = clean_html(html)
+        assert "Careers" in cleaned
+        assert "AI Engineer" in cleaned
+        assert "<path" not in cleaned
+
+    def test_self_closing_svg_is_empty(self):
+        html = '<body><svg viewBox="0 0 1 1"/><div class="job">AI Engineer</div><svg></svg></body>'
+        cleaned = clean_html(html)
+        assert "AI Engineer" in cleaned
+        assert "<svg" not in cleaned
+
     def test_truncation(self):
         long_html = "<body>" + "x" * 100000 + "</body>"
         cleaned = clean_html(long_html, max_length=1000)
         assert len(cleaned) <= 1020  # allow for truncation suffix
         assert "TRUNCATED" in cleaned
 
+    def test_budget_cut_drops_partial_tag(self):
+        # Parse budget is 4 * max_length = 200 chars, which ends inside the <a> tag
+        html = "<body><script>" + "x" * 150 + '</script><a href="/jobs/1" class="job-link">Job</a></body>'
+        cleaned = clean_html(html, max_length=50)
+        assert "<a" not in cleaned
+
+    def test_budget_cut_inside_script_drops_script_body(self):
+        # Parse budget is 200 chars, which ends inside the <script> body
+        html = "<body><p>Open roles</p><script>var leak = 1;" + "x" * 300 + "</script></body>"
+        cleaned = clean_html(html, max_length=50)
+        assert "leak" not in cleaned
+        assert "Open roles" in cleaned
+
+    def test_unclosed_block_without_cut_is_kept(self):
+        # </head> is optional in HTML5; without a budget cut nothing runs to end of input
+        html = "<html><head><title>Careers</title><p>AI Engineer</p></html>"
+        cleaned = clean_html(html)
+        assert "AI Engineer" in cleaned
+
 
 class TestPageSignature:
     def test_same_structure_same_signature(self):
@@ -57,6 +115,16 @@ class TestPageSignature:
         html2 = '<div class="x"><p class="y">text</p></div>'
         assert compute_page_signature(html1) != compute_page_signature(html2)
 
+    def test_repeated_page_is_not_reparsed(self, monkeypatch):
+        html = '<div class="cached"><span class="once">text</span></div>'
+        expected = compute_page_signature(html)
+
+        def _fail(_html):
+            raise AssertionError("page was parsed again")
+
+        monkeypatch.setattr(extractor, "_structural_signature", _fail)
+        assert compute_page_signature(html) == expected
+
 
 class TestExtractWithSelectors:
     def test_extracts_jobs_with_valid_selectors(self):
@@ -81,6 +149,74 @@ class TestExtractWithSelectors:
         assert jobs[1]["title"] == "ML Engineer"
         assert jobs[1]["salary_range"] is None
 
+    def test_collapses_whitespace_in_text(self):
+        html = """
+        <div class="job-card">
+            <h3 class="job-title">Senior
+                AI <em>Engineer</em></h3>
+        </div>
+        """
+        selectors = {"job_list_selector": ".job-card", "title_selector": ".job-title"}
+
+        jobs = extract_with_selectors(html, selectors, "https://example.com")
+        assert jobs[0]["title"] == "Senior AI Engineer"
+
+    def test_resolves_relative_job_urls(self):
+        html = """
+        <div class="job-card"><a class="job-title" href="jobs/1">Relative</a></div>
+        <div class="job-card"><a class="job-title" href="//cdn.example.com/jobs/2">Protocol</a></div>
+        <div class="job-card"><a class="job-title" href="javascript:void(0)">Script</a></div>
+        """
+        selectors = {
+            "job_list_selector": ".job-card",
+            "title_selector": ".job-title",
+            "url_selector": ".job-title",
+        }
+
+        jobs = extract_with_selectors(html, selectors, "https://example.com/careers/")
+        assert [job["source_url"] for job in jobs] == [
+            "https://example.com/careers/jobs/1",
+            "https://cdn.example.com/jobs/2",
+            "",
+        ]
+
+    def test_invalid_field_selector_is_ignored(self):
+        selectors = {
+            "job_list_selector": ".job-card",
+            "title_selector": ".job-title",
+            "salary_selector": "[[not a selector",
+        }
+
+        jobs = extract_with_selectors(SAMPLE_HTML, selectors, "https://example.com")
+
+        assert [job["title"] for job in jobs] == ["AI Engineer", "ML Engineer"]
+        assert all(job["salary_range"] is None for job in jobs)
+
+    def test_reuses_extractor_for_equal_selector_dicts(self):
+        selectors = {"job_list_selector": ".job-card", "title_selector": ".job-title"}
+
+        extract_with_selectors(SAMPLE_HTML, selectors, "https://example.com")
+        before = extractor._selector_extractor.cache_info().hits
+        jobs = extract_with_selectors(SAMPLE_HTML, dict(selectors), "https://example.com")
+
+        assert extractor._selector_extractor.cache_info().hits == before + 1
+        assert len(jobs) == 2
+
+    def test_keyword_adds_search_fields(self):
+        selectors = {"job_list_selector": ".job-card", "title_selector": ".job-title"}
+
+        jobs = extract_with_selectors(SAMPLE_HTML, selectors, "https://example.com/careers", keyword="ai")
+
+        assert jobs[0]["search_keyword"] == "ai"
+        assert jobs[0]["source_site"] == "example.com"
+
+    def test_iter_jobs_stops_early(self):
+        selectors = {"job_list_selector": ".job-card", "title_selector": ".job-title"}
+
+        jobs = list(islice(iter_jobs(SAMPLE_HTML, selectors, "https://example.com"), 1))
+
+        assert [job["title"] for job in jobs] == ["AI Engineer"]
+
     def test_returns_empty_with_wrong_selectors(self):
         selectors = {
             "job_list_selector": ".nonexistent",
@@ -104,3 +240,30 @@ class TestExtractWithSelectors:
 
         jobs = extract_with_selectors(html, selectors, "https://example.com")
         assert jobs == []
+
+
+class TestLLMExtractorBatched:
+    def test_results_follow_page_order_and_isolate_failures(self):
+        llm = LLMExtractor()
+        llm._model = MagicMock()
+        good = MagicMock(content=json.dumps({
+            "jobs": [{"title": "Engineer", "job_url": "https://example.com/job/1"}],
+            "selectors": {"job_list_selector": ".job"},
+        }))
+        llm._model.batch.return_value = [
+            good,
+            RuntimeError("boom"),
+            MagicMock(content="not json"),
+            MagicMock(content="[1, 2]"),
+            MagicMock(content='{"jobs": ["x"]}'),
+        ]
+
+        pages = [("<body><p>x</p></body>", f"https://example.com/p{i}", "python") for i in range(5)]
+        results = llm.extract_jobs_batched(pages, max_concurrency=2)
+
+        assert llm._model.batch.call_count == 1
+        assert llm._model.batch.call_args.kwargs["config"] == {"max_concurrency": 2}
+        jobs, selectors = results[0]
+        assert jobs[0]["source_url"] == "https://example.com/job/1"
+        assert selectors == {"job_list_selector": ".job"}
+        assert results[1:] == [([], None)] * 4
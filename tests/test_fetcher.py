@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+from playwright.async_api import Error as PlaywrightError
+
+from crawler.anti_throttle.proxies import ProxyPool
+from crawler.generic.fetcher import StealthFetcher
+from crawler.settings import settings
+
+URL = "https://jobs.example.com/careers"
+DOMAIN = "jobs.example.com"
+
+
+def make_fetcher(monkeypatch, handler) -> StealthFetcher:
+    monkeypatch.setattr(settings, "min_delay", 0.0)
+    monkeypatch.setattr(settings, "max_delay", 0.0)
+    monkeypatch.setattr(settings, "max_concurrent_per_domain", 1)
+    # Open the circuit on the first failure so failures are observable
+    monkeypatch.setattr(settings, "circuit_breaker_threshold", 1)
+    # Pooled clients keep their real configuration, only the network is mocked
+    monkeypatch.setattr(httpx, "AsyncClient", partial(httpx.AsyncClient, transport=httpx.MockTransport(handler)))
+    return StealthFetcher(proxy_pool=ProxyPool([]))
+
+
+async def read_all(fetcher: StealthFetcher, url: str) -> bytes | None:
+    async with fetcher.fetch_stream(url) as chunks:
+        if chunks is None:
+            return None
+        return b"".join([chunk async for chunk in chunks])
+
+
+class TestFetchStatic:
+    @pytest.mark.asyncio
+    async def test_pooled_client_does_not_replay_cookies(self, monkeypatch):
+        sent_cookies = []
+
+        def handler(request):
+            sent_cookies.append(request.headers.get("cookie"))
+            return httpx.Response(200, text="jobs", headers={"set-cookie": "cf_clearance=abc; Path=/"})
+
+        fetcher = make_fetcher(monkeypatch, handler)
+        assert await fetcher.fetch_static(URL) == "jobs"
+        assert await fetcher.fetch_static(URL) == "jobs"
+        assert sent_cookies == [None, None]
+        await fetcher.aclose()
+
+
+class TestFetchStream:
+    @pytest.mark.asyncio
+    async def test_streams_body(self, monkeypatch):
+        fetcher = make_fetcher(monkeypatch, lambda request: httpx.Response(200, content=b"<html>jobs</html>"))
+        assert await read_all(fetcher, URL) == b"<html>jobs</html>"
+        assert not fetcher.circuit.is_open(DOMAIN)
+        await fetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_error_status_yields_none(self, monkeypatch):
+        fetcher = make_fetcher(monkeypatch, lambda request: httpx.Response(404))
+        assert await read_all(fetcher, URL) is None
+        assert fetcher.circuit.is_open(DOMAIN)
+        await fetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_transport_error_is_recorded_and_raised(self, monkeypatch):
+        def handler(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        fetcher = make_fetcher(monkeypatch, handler)
+        with pytest.raises(httpx.ConnectError):
+            await read_all(fetcher, URL)
+        assert fetcher.circuit.is_open(DOMAIN)
+        await fetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_early_exit_releases_domain_slot(self, monkeypatch):
+        fetcher = make_fetcher(monkeypatch, lambda request: httpx.Response(200, content=b"x" * 100_000))
+        async with fetcher.fetch_stream(URL) as chunks:
+            async for _chunk in chunks:
+                break
+
+        # Only one fetch per domain is allowed, so this blocks if the slot leaked
+        html = await asyncio.wait_for(fetcher.fetch_static(URL), timeout=1)
+        assert html == "x" * 100_000
+        await fetcher.aclose()
+
+
+class TestFetchJs:
+    @pytest.mark.asyncio
+    async def test_unparseable_ready_selector_falls_back_to_fixed_wait(self, monkeypatch):
+        fetcher = make_fetcher(monkeypatch, lambda request: httpx.Response(200))
+        monkeypatch.setattr(fetcher, "start", AsyncMock())
+        page = MagicMock()
+        page.goto = AsyncMock(return_value=MagicMock(status=200))
+        page.wait_for_selector = AsyncMock(side_effect=PlaywrightError("Unexpected token \":contains(\""))
+        page.wait_for_timeout = AsyncMock()
+        page.content = AsyncMock(return_value="<html>jobs</html>")
+        page.close = AsyncMock()
+        context = MagicMock()
+        context.new_page = AsyncMock(return_value=page)
+        context.close = AsyncMock()
+        fetcher._context_pool.append(context)
+
+        html = await fetcher.fetch_js(URL, ready_selector=".job:contains('Engineer')")
+
+        assert html == "<html>jobs</html>"
+        page.wait_for_timeout.assert_awaited_once_with(2000)
+        assert not fetcher.circuit.is_open(DOMAIN)
+        # The context stays pooled for the next fetch
+        assert fetcher._context_pool == [context]
+        await fetcher.aclose()
@@ -96,6 +96,21 @@ def test_search_job_boards_handles_exception(mock_scrape):
     assert results == []
 
 
+@patch("crawler.jobspy_adapter.scrape_jobs")
+def test_search_job_boards_dedupes_sites(mock_scrape):
+    from crawler.jobspy_adapter import search_job_boards
+
+    mock_scrape.return_value = pd.DataFrame()
+
+    search_job_boards(
+        keyword="AI",
+        location="SF",
+        sites=["indeed", "linkedin", "indeed", "unknown_board"],
+    )
+
+    assert mock_scrape.call_args.kwargs["site_name"] == ["indeed", "linkedin"]
+
+
 def test_search_job_boards_unknown_site():
     from crawler.jobspy_adapter import search_job_boards
 
@@ -106,3 +121,60 @@ def test_search_job_boards_unknown_site():
     )
 
     assert results == []
+
+
+@patch("crawler.jobspy_adapter.scrape_jobs")
+def test_search_job_boards_normalizes_missing_values(mock_scrape):
+    import datetime
+
+    from crawler.jobspy_adapter import search_job_boards
+
+    mock_scrape.return_value = pd.DataFrame([
+        {
+            "site": "indeed",
+            "job_url": "https://indeed.com/job/1",
+            "title": "Data Engineer",
+            "company_name": None,
+            "location": None,
+            "description": None,
+            "min_amount": 90000,
+            "max_amount": None,
+            "interval": "yearly",
+            "date_posted": datetime.date(2025, 2, 1),
+        },
+        {
+            "site": "indeed",
+            "job_url": None,
+            "title": "No URL",
+            "company_name": "Nobody",
+            "location": "Remote",
+            "description": "",
+            "min_amount": None,
+            "max_amount": None,
+            "interval": None,
+            "date_posted": None,
+        },
+    ])
+
+    results = search_job_boards(keyword="data", location="SF", sites=["indeed"])
+
+    assert len(results) == 1
+    job = results[0]
+    assert job["company"] == ""
+    assert job["location"] == ""
+    assert job["salary_range"] == "$90,000+ (yearly)"
+    assert job["posted_date"] == datetime.date(2025, 2, 1)
+
+
+@patch("crawler.jobspy_adapter.scrape_jobs")
+def test_search_job_boards_missing_columns(mock_scrape):
+    from crawler.jobspy_adapter import search_job_boards
+
+    mock_scrape.return_value = pd.DataFrame([
+        {"site": "indeed", "job_url": "https://indeed.com/job/1", "title": "Engineer"},
+    ])
+
+    results = search_job_boards(keyword="AI", location="SF", sites=["indeed"])
+
+    assert results[0]["salary_range"] is None
+    assert results[0]["posted_date"] is None
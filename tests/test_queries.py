@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import hashlib
+
+from crawler.db.queries import compute_content_hash, compute_content_hashes
+
+
+class TestComputeContentHash:
+    def test_matches_hash_of_joined_content(self):
+        expected = hashlib.blake2b(b"AI Engineer|TechCorp|Build AI systems", digest_size=32).hexdigest()
+        assert compute_content_hash("Build AI systems", "AI Engineer", "TechCorp") == expected
+
+    def test_missing_description_hashes_as_empty(self):
+        assert compute_content_hash(None, "AI Engineer", "TechCorp") == compute_content_hash(
+            "", "AI Engineer", "TechCorp"
+        )
+
+    def test_fields_are_separated(self):
+        assert compute_content_hash("", "ab", "c") != compute_content_hash("", "a", "bc")
+
+    def test_fits_content_hash_column(self):
+        assert len(compute_content_hash("x" * 10000, "t", "c")) == 64
+
+
+class TestComputeContentHashes:
+    def test_matches_single_hashes(self):
+        jobs = [{"title": f"Job {i}", "company": "Corp", "description": "d" * 4096} for i in range(20)]
+        expected = [compute_content_hash(j["description"], j["title"], j["company"]) for j in jobs]
+        assert compute_content_hashes(jobs) == expected
+        assert compute_content_hashes([]) == []